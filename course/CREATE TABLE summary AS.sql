@@ -1,11 +1,102 @@
-CREATE TABLE summary AS
-SELECT 
-      year AS publication_year,
-        COUNT(*) AS book_count,
-        ROUND(AVG(CASE 
-                 WHEN price LIKE '€%' THEN CAST(REPLACE(price, '€', '') AS NUMERIC) * 1.2
-                    ELSE CAST(REPLACE(price, '$', '') AS NUMERIC)
-                    END), 2) AS average_price_usd
-FROM books
-GROUP BY year  
-ORDER BY publication_year;
\ No newline at end of file
+-- Per-year summary kept current by statement-level triggers on books.
+-- Each INSERT/UPDATE/DELETE statement folds only its own rows (the
+-- transition tables) into running totals, so the summary never rescans
+-- books after the initial build. Safe to run repeatedly.
+
+DO $$
+BEGIN
+    -- Replace the table left behind by the old CREATE TABLE summary AS
+    IF EXISTS (SELECT 1 FROM pg_class WHERE oid = to_regclass('summary') AND relkind = 'r') THEN
+        DROP TABLE summary;
+    END IF;
+
+    IF to_regclass('summary_totals') IS NULL THEN
+        CREATE TABLE summary_totals (
+            publication_year INT PRIMARY KEY,
+            book_count BIGINT NOT NULL,
+            priced_count BIGINT NOT NULL,
+            price_usd_sum NUMERIC NOT NULL
+        );
+        INSERT INTO summary_totals
+        SELECT year, COUNT(*), COUNT(price_usd), COALESCE(SUM(price_usd), 0)
+        FROM books
+        WHERE year IS NOT NULL
+        GROUP BY year;
+    END IF;
+END
+$$;
+
+CREATE OR REPLACE FUNCTION summary_apply_delta() RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF TG_OP = 'TRUNCATE' THEN
+        DELETE FROM summary_totals;
+        RETURN NULL;
+    END IF;
+
+    -- Old rows count negatively, so an UPDATE that moves a book to another
+    -- year or changes its price nets out correctly
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO summary_totals AS s
+        SELECT year, COUNT(*), COUNT(price_usd), COALESCE(SUM(price_usd), 0)
+        FROM new_rows WHERE year IS NOT NULL GROUP BY year
+        ON CONFLICT (publication_year) DO UPDATE SET
+            book_count = s.book_count + EXCLUDED.book_count,
+            priced_count = s.priced_count + EXCLUDED.priced_count,
+            price_usd_sum = s.price_usd_sum + EXCLUDED.price_usd_sum;
+    ELSIF TG_OP = 'DELETE' THEN
+        INSERT INTO summary_totals AS s
+        SELECT year, -COUNT(*), -COUNT(price_usd), -COALESCE(SUM(price_usd), 0)
+        FROM old_rows WHERE year IS NOT NULL GROUP BY year
+        ON CONFLICT (publication_year) DO UPDATE SET
+            book_count = s.book_count + EXCLUDED.book_count,
+            priced_count = s.priced_count + EXCLUDED.priced_count,
+            price_usd_sum = s.price_usd_sum + EXCLUDED.price_usd_sum;
+    ELSE
+        INSERT INTO summary_totals AS s
+        SELECT year, SUM(n), SUM(priced), SUM(price_usd)
+        FROM (
+            SELECT year, 1 AS n, (price_usd IS NOT NULL)::INT AS priced, COALESCE(price_usd, 0) AS price_usd
+            FROM new_rows
+            UNION ALL
+            SELECT year, -1, -(price_usd IS NOT NULL)::INT, -COALESCE(price_usd, 0)
+            FROM old_rows
+        ) AS delta
+        WHERE year IS NOT NULL
+        GROUP BY year
+        ON CONFLICT (publication_year) DO UPDATE SET
+            book_count = s.book_count + EXCLUDED.book_count,
+            priced_count = s.priced_count + EXCLUDED.priced_count,
+            price_usd_sum = s.price_usd_sum + EXCLUDED.price_usd_sum;
+    END IF;
+
+    DELETE FROM summary_totals WHERE book_count = 0;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS books_summary_insert ON books;
+DROP TRIGGER IF EXISTS books_summary_update ON books;
+DROP TRIGGER IF EXISTS books_summary_delete ON books;
+DROP TRIGGER IF EXISTS books_summary_truncate ON books;
+
+CREATE TRIGGER books_summary_insert AFTER INSERT ON books
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION summary_apply_delta();
+CREATE TRIGGER books_summary_update AFTER UPDATE ON books
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION summary_apply_delta();
+CREATE TRIGGER books_summary_delete AFTER DELETE ON books
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION summary_apply_delta();
+CREATE TRIGGER books_summary_truncate AFTER TRUNCATE ON books
+    FOR EACH STATEMENT EXECUTE FUNCTION summary_apply_delta();
+
+CREATE OR REPLACE VIEW summary AS
+SELECT
+      publication_year,
+        book_count,
+        ROUND(price_usd_sum / NULLIF(priced_count, 0), 2) AS average_price_usd
+FROM summary_totals
+ORDER BY publication_year;
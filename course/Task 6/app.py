@@ -1,9 +1,27 @@
 
-from flask import Flask, render_template_string, request
-import psycopg2, psycopg2.extras
+import os
+import time
+import threading
+from contextlib import contextmanager
+from flask import Flask, jsonify, render_template_string, request
+import psycopg2, psycopg2.extras, psycopg2.pool
+import fake_users
 
 app = Flask(__name__)
-DB = "dbname=course_db user=postgres password=1128327 host=localhost"
+DB = os.environ.get("FAKE_USERS_DSN", "dbname=course_db user=postgres password=1128327 host=localhost")
+POOL_MIN = int(os.environ.get("FAKE_USERS_POOL_MIN", "1"))
+POOL_MAX = int(os.environ.get("FAKE_USERS_POOL_MAX", "10"))
+# Seconds a request may wait for a free connection before failing
+POOL_TIMEOUT = float(os.environ.get("FAKE_USERS_POOL_TIMEOUT", "10"))
+# Connections idle for longer than this are pinged before being handed out
+POOL_CHECK_AFTER = float(os.environ.get("FAKE_USERS_POOL_CHECK_AFTER", "30"))
+# "local" builds users in-process from cached name dictionaries, "db" calls
+# generate_fake_users() for every page; both give the same users
+GENERATOR = os.environ.get("FAKE_USERS_GENERATOR", "local")
+# Seconds between checks of name_index_version for changed dictionaries
+DICT_REFRESH = float(os.environ.get("FAKE_USERS_DICT_REFRESH", "60"))
+
+DISCONNECTS = (psycopg2.OperationalError, psycopg2.InterfaceError)
 
 HTML = """
 <form method="post">
@@ -27,13 +45,153 @@ HTML = """
 {% endif %}
 """
 
+
+class PoolTimeout(Exception):
+    pass
+
+
+class Pool:
+    # Process-wide pool shared by all request threads. psycopg2's pool
+    # raises as soon as it is exhausted, so a semaphore makes callers queue
+    # for a free connection instead; the time they spend queued is recorded.
+    # The pool is opened lazily, so each forked server worker gets its own.
+
+    def __init__(self, dsn, minconn, maxconn, timeout, check_after):
+        self.dsn = dsn
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.check_after = check_after
+        self.slots = threading.BoundedSemaphore(maxconn)
+        self.lock = threading.Lock()
+        self.pool = None
+        self.pid = None
+        self.last_used = {}
+        self.checkouts = 0
+        self.waited = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.timeouts = 0
+        self.reconnects = 0
+
+    def _pool(self):
+        with self.lock:
+            if self.pool is None or self.pid != os.getpid():
+                self.pool = psycopg2.pool.ThreadedConnectionPool(self.minconn, self.maxconn, self.dsn)
+                self.pid = os.getpid()
+                self.last_used = {}
+            return self.pool
+
+    def _healthy(self, conn):
+        if conn.closed:
+            return False
+        if time.monotonic() - self.last_used.get(id(conn), 0) < self.check_after:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except DISCONNECTS:
+            return False
+
+    def _checkout(self):
+        pool = self._pool()
+        conn = pool.getconn()
+        if not self._healthy(conn):
+            pool.putconn(conn, close=True)
+            with self.lock:
+                self.reconnects += 1
+            conn = pool.getconn()
+        return pool, conn
+
+    @contextmanager
+    def connection(self):
+        started = time.monotonic()
+        if not self.slots.acquire(timeout=self.timeout):
+            with self.lock:
+                self.timeouts += 1
+            raise PoolTimeout(f"no database connection free after {self.timeout}s")
+        waited = time.monotonic() - started
+        with self.lock:
+            self.checkouts += 1
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+            if waited > 0.001:
+                self.waited += 1
+        try:
+            pool, conn = self._checkout()
+            broken = False
+            try:
+                yield conn
+            except DISCONNECTS:
+                broken = True
+                raise
+            finally:
+                self.last_used[id(conn)] = time.monotonic()
+                pool.putconn(conn, close=broken or conn.closed)
+        finally:
+            self.slots.release()
+
+    def stats(self):
+        with self.lock:
+            return {
+                "min": self.minconn,
+                "max": self.maxconn,
+                "open": len(self.pool._pool) + len(self.pool._used) if self.pool else 0,
+                "in_use": len(self.pool._used) if self.pool else 0,
+                "checkouts": self.checkouts,
+                "waited": self.waited,
+                "wait_avg_ms": self.wait_total / self.checkouts * 1000 if self.checkouts else 0.0,
+                "wait_max_ms": self.wait_max * 1000,
+                "timeouts": self.timeouts,
+                "reconnects": self.reconnects,
+            }
+
+
+pool = Pool(DB, POOL_MIN, POOL_MAX, POOL_TIMEOUT, POOL_CHECK_AFTER)
+
+
+class Dictionaries:
+    # Name dictionaries loaded once per process; the database is only asked
+    # whether they changed, at most every DICT_REFRESH seconds
+
+    def __init__(self, refresh):
+        self.refresh = refresh
+        self.lock = threading.Lock()
+        self.names = None
+        self.version = None
+        self.checked = 0.0
+
+    def get(self):
+        with self.lock:
+            if self.names is None or time.monotonic() - self.checked >= self.refresh:
+                with pool.connection() as conn:
+                    if self.names is None or fake_users.dictionary_version(conn) != self.version:
+                        self.names, self.version = fake_users.load_dictionaries(conn)
+                self.checked = time.monotonic()
+            return self.names
+
+
+dictionaries = Dictionaries(DICT_REFRESH)
+
+
 def get_users(locale, seed, batch_index):
-    conn = psycopg2.connect(DB)
-    cur = conn.cursor(cursor_factory=psycopg2.extras.DictCursor)
-    cur.execute("SELECT * FROM generate_fake_users(%s,%s,%s,%s)", (locale, seed, batch_index, 10))
-    rows = cur.fetchall()
-    conn.close()
-    return rows
+    if GENERATOR == "local":
+        return fake_users.generate_users(dictionaries.get(), locale, seed, batch_index, 10)
+    # The query only reads, so a connection that drops mid-request is
+    # replaced and the query retried once
+    for attempt in (1, 2):
+        try:
+            with pool.connection() as conn:
+                cur = conn.cursor(cursor_factory=psycopg2.extras.DictCursor)
+                cur.execute("SELECT * FROM generate_fake_users(%s,%s,%s,%s)", (locale, seed, batch_index, 10))
+                return cur.fetchall()
+        except DISCONNECTS:
+            if attempt == 2:
+                raise
+            with pool.lock:
+                pool.reconnects += 1
 
 @app.route("/", methods=["GET","POST"])
 def index():
@@ -45,6 +203,10 @@ def index():
     users = get_users(locale, seed, batch_index) if request.method=="POST" else None
     return render_template_string(HTML, users=users, locale=locale, seed=seed, batch_index=batch_index)
 
+@app.route("/pool")
+def pool_stats():
+    return jsonify(pool.stats())
+
 
 if __name__ == "__main__":
     app.run()
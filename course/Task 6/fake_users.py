@@ -0,0 +1,147 @@
+
+import os
+import csv
+import hashlib
+import argparse
+
+import numpy as np
+import psycopg2
+
+# Python copy of generate_fake_users() in task6_query.sql. Both derive every
+# value from md5 over "seed:batch:row:stream", so for the same name
+# dictionaries they produce the same users without touching the database.
+
+STREAM_FIRST, STREAM_LAST, STREAM_PHONE = 0, 1, 2
+SCALE = float(1 << 52)
+COLUMNS = ("full_name", "email", "phone")
+CHUNK_ROWS = 100_000
+
+
+def uniform(seed, batch, row, stream):
+    # Top 52 bits of the md5, as fake_uniform() reads them in SQL
+    digest = hashlib.md5(f"{seed}:{batch}:{row}:{stream}".encode()).digest()
+    return (int.from_bytes(digest[:8], "big") >> 12) / SCALE
+
+
+def phone_prefix(locale):
+    return "+49 " if locale == "de_DE" else "+1-"
+
+
+def dictionary_version(conn):
+    with conn.cursor() as cur:
+        cur.execute("SELECT version FROM name_index_version")
+        version = cur.fetchone()[0]
+    conn.rollback()
+    return version
+
+
+def load_dictionaries(conn):
+    # {locale: (first names, last names)} in name_index order, plus the
+    # name_index_version they were read at. One statement, so the version
+    # and the names come from the same snapshot.
+    with conn.cursor() as cur:
+        cur.execute("SELECT v.version, n.locale, n.type, n.value"
+                    " FROM name_index_version v LEFT JOIN name_index n ON TRUE"
+                    " ORDER BY n.locale, n.type, n.idx")
+        version, names = None, {}
+        for version, locale, kind, value in cur:
+            if locale is not None:
+                names.setdefault(locale, ([], []))[kind == "last"].append(value)
+    conn.rollback()
+    return names, version
+
+
+def generate_users(names, locale, seed, batch_index, batch_size=10):
+    first, last = names.get(locale, ((), ()))
+    users = []
+    for row in range(1, batch_size + 1):
+        full_name = None
+        if first and last:
+            full_name = (first[int(uniform(seed, batch_index, row, STREAM_FIRST) * len(first))] + " "
+                         + last[int(uniform(seed, batch_index, row, STREAM_LAST) * len(last))])
+        email = hashlib.md5(f"{seed}:{batch_index}:{row}:email".encode()).hexdigest()[:8] + "@example.com"
+        phone = phone_prefix(locale) + str(int(uniform(seed, batch_index, row, STREAM_PHONE) * 900000000 + 100000000))
+        users.append({"full_name": full_name, "email": email, "phone": phone})
+    return users
+
+
+def _uniform_many(prefixes, stream):
+    # One md5 per key is unavoidable; the bit slicing and scaling run in NumPy
+    digests = b"".join([hashlib.md5(f"{p}:{stream}".encode()).digest() for p in prefixes])
+    return (np.frombuffer(digests, dtype=">u8")[::2] >> 12) / SCALE
+
+
+def generate_columns(names, locale, seed, first_batch, batches, batch_size=10):
+    # Same users as generate_users() for batches first_batch .. + batches,
+    # as columns of NumPy object arrays
+    batch = np.repeat(np.arange(first_batch, first_batch + batches), batch_size)
+    row = np.tile(np.arange(1, batch_size + 1), batches)
+    prefixes = [f"{seed}:{b}:{r}" for b, r in zip(batch.tolist(), row.tolist())]
+
+    first, last = names.get(locale, ((), ()))
+    if first and last:
+        first_idx = (_uniform_many(prefixes, STREAM_FIRST) * len(first)).astype(np.int64)
+        last_idx = (_uniform_many(prefixes, STREAM_LAST) * len(last)).astype(np.int64)
+        full_name = np.array(first, dtype=object)[first_idx] + " " + np.array(last, dtype=object)[last_idx]
+    else:
+        full_name = np.full(len(prefixes), None, dtype=object)
+
+    email = np.array([hashlib.md5(f"{p}:email".encode()).hexdigest()[:8] for p in prefixes], dtype=object)
+    digits = (_uniform_many(prefixes, STREAM_PHONE) * 900000000 + 100000000).astype(np.int64)
+    phone = phone_prefix(locale) + digits.astype(str).astype(object)
+    return {"full_name": full_name, "email": email + "@example.com", "phone": phone}
+
+
+def iter_chunks(names, locale, seed, first_batch, batches, batch_size=10, chunk_rows=CHUNK_ROWS):
+    step = max(1, chunk_rows // batch_size)
+    for start in range(first_batch, first_batch + batches, step):
+        yield generate_columns(names, locale, seed, start, min(step, first_batch + batches - start), batch_size)
+
+
+def write_csv(chunks, path):
+    count = 0
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(COLUMNS)
+        for chunk in chunks:
+            writer.writerows(zip(*(chunk[c] for c in COLUMNS)))
+            count += len(chunk["email"])
+    return count
+
+
+def write_parquet(chunks, path):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([(c, pa.string()) for c in COLUMNS])
+    count = 0
+    with pq.ParquetWriter(path, schema) as writer:
+        for chunk in chunks:
+            writer.write_table(pa.table({c: chunk[c] for c in COLUMNS}, schema=schema))
+            count += len(chunk["email"])
+    return count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate fake users in-process to CSV or Parquet")
+    parser.add_argument("output", type=str, help="Output file (.csv or .parquet)")
+    parser.add_argument("--dsn", type=str, default=os.environ.get(
+        "FAKE_USERS_DSN", "dbname=course_db user=postgres password=1128327 host=localhost"),
+        help="Database holding the name dictionaries (or set FAKE_USERS_DSN)")
+    parser.add_argument("--locale", type=str, default="en_US", help="Locale of the generated users")
+    parser.add_argument("--seed", type=int, default=42, help="Seed, as in the web form")
+    parser.add_argument("--first-batch", type=int, default=0, help="First batch index")
+    parser.add_argument("--batches", type=int, default=100_000, help="Number of batches")
+    parser.add_argument("--batch-size", type=int, default=10, help="Users per batch")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS, help="Rows generated per chunk")
+    args = parser.parse_args()
+
+    conn = psycopg2.connect(args.dsn)
+    names, _ = load_dictionaries(conn)
+    conn.close()
+
+    chunks = iter_chunks(names, args.locale, args.seed, args.first_batch, args.batches,
+                         args.batch_size, args.chunk_rows)
+    write = write_parquet if args.output.endswith(".parquet") else write_csv
+    count = write(chunks, args.output)
+    print(f"Wrote {count} users to {args.output}")
@@ -1,4 +1,6 @@
 DROP FUNCTION IF EXISTS generate_fake_users(text, integer, integer, integer);
+DROP FUNCTION IF EXISTS fake_uniform(integer, integer, integer, integer);
+DROP TABLE IF EXISTS name_index;
 DROP TABLE IF EXISTS names CASCADE;
 DROP TABLE IF EXISTS locales CASCADE;
 
@@ -14,6 +16,53 @@ CREATE TABLE names (
     value  TEXT NOT NULL
 );
 
+-- names numbered 1..n per (locale, type), so a random pick is one primary
+-- key lookup. Rebuilt by the trigger below whenever names changes, which
+-- also bumps name_index_version so in-process copies know to reload. The
+-- version is a row, not a sequence, so the bump becomes visible together
+-- with the rebuilt index at commit; the table survives reruns of this
+-- script, so versions never repeat. Databases set up when the version was
+-- a sequence carry its last value over.
+DO $$
+DECLARE
+    v_start BIGINT := 0;
+BEGIN
+    IF EXISTS (SELECT FROM pg_class WHERE oid = to_regclass('name_index_version') AND relkind = 'S') THEN
+        SELECT last_value INTO v_start FROM name_index_version;
+        DROP SEQUENCE name_index_version;
+    END IF;
+    CREATE TABLE IF NOT EXISTS name_index_version (
+        one_row BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (one_row),
+        version BIGINT NOT NULL
+    );
+    INSERT INTO name_index_version(version) VALUES (v_start) ON CONFLICT DO NOTHING;
+END;
+$$;
+
+CREATE TABLE name_index (
+    locale TEXT,
+    type   TEXT,
+    idx    INT,
+    value  TEXT NOT NULL,
+    PRIMARY KEY (locale, type, idx)
+);
+
+CREATE OR REPLACE FUNCTION refresh_name_index() RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    DELETE FROM name_index;
+    INSERT INTO name_index(locale, type, idx, value)
+    SELECT locale, type, row_number() OVER (PARTITION BY locale, type ORDER BY id), value
+    FROM names;
+    UPDATE name_index_version SET version = version + 1;
+    RETURN NULL;
+END;
+$$;
+
+CREATE TRIGGER names_refresh_index AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON names
+    FOR EACH STATEMENT EXECUTE FUNCTION refresh_name_index();
+
 INSERT INTO locales(code, description) VALUES
 ('en_US','English (USA)'), ('de_DE','German (Germany)');
 
@@ -23,6 +72,18 @@ INSERT INTO names(locale,type,value) VALUES
 ('de_DE','first','Hans'),('de_DE','first','Anna'),
 ('de_DE','last','Müller'),('de_DE','last','Schneider');
 
+-- Counter-based random numbers: every draw is a hash of (seed, batch, row,
+-- stream), so any batch can be generated on its own, in any order or in
+-- parallel, and different (seed, batch) pairs never share a stream.
+-- The top 52 bits of the md5 give a uniform double in [0, 1).
+CREATE OR REPLACE FUNCTION fake_uniform(p_seed INT, p_batch INT, p_row INT, p_stream INT)
+RETURNS double precision
+LANGUAGE sql IMMUTABLE PARALLEL SAFE
+AS $$
+    SELECT ('x' || substr(md5(p_seed::text || ':' || p_batch::text || ':' || p_row::text || ':' || p_stream::text), 1, 13))::bit(52)::bigint
+           / 4503599627370496.0::double precision
+$$;
+
 CREATE OR REPLACE FUNCTION generate_fake_users(
     p_locale       TEXT,
     p_seed         INT,
@@ -30,31 +91,33 @@ CREATE OR REPLACE FUNCTION generate_fake_users(
     p_batch_size   INT DEFAULT 10
 )
 RETURNS TABLE(full_name TEXT, email TEXT, phone TEXT)
-LANGUAGE plpgsql
+LANGUAGE plpgsql STABLE PARALLEL SAFE
 AS $$
+DECLARE
+    v_first INT;
+    v_last  INT;
 BEGIN
-    
-    PERFORM setseed( ((p_seed + p_batch_index) % 100)::float / 100.0 );
+    SELECT max(idx) INTO v_first FROM name_index WHERE locale = p_locale AND type = 'first';
+    SELECT max(idx) INTO v_last FROM name_index WHERE locale = p_locale AND type = 'last';
 
+    -- Indexes are drawn per row first, then resolved to names by key
     RETURN QUERY
     SELECT
-        (
-          (SELECT n1.value FROM names n1
-             WHERE n1.locale = p_locale AND n1.type = 'first'
-             ORDER BY random() LIMIT 1)
-          || ' ' ||
-          (SELECT n2.value FROM names n2
-             WHERE n2.locale = p_locale AND n2.type = 'last'
-             ORDER BY random() LIMIT 1)
-        ) AS full_name,
-        lower(substr(md5(random()::text), 1, 8)) || '@example.com' AS email,
+        (f.value || ' ' || l.value) AS full_name,
+        substr(md5(p_seed || ':' || p_batch_index || ':' || r.g || ':email'), 1, 8) || '@example.com' AS email,
         CASE
           WHEN p_locale = 'de_DE'
-            THEN '+49 ' || floor(random()*900000000 + 100000000)::TEXT
-          ELSE '+1-' || floor(random()*900000000 + 100000000)::TEXT
+            THEN '+49 ' || floor(fake_uniform(p_seed, p_batch_index, r.g, 2)*900000000 + 100000000)::TEXT
+          ELSE '+1-' || floor(fake_uniform(p_seed, p_batch_index, r.g, 2)*900000000 + 100000000)::TEXT
         END AS phone
-    FROM generate_series(1, p_batch_size);
+    FROM (
+        SELECT g,
+               1 + floor(fake_uniform(p_seed, p_batch_index, g, 0) * v_first)::INT AS first_idx,
+               1 + floor(fake_uniform(p_seed, p_batch_index, g, 1) * v_last)::INT AS last_idx
+        FROM generate_series(1, p_batch_size) AS g
+    ) AS r
+    LEFT JOIN name_index f ON f.locale = p_locale AND f.type = 'first' AND f.idx = r.first_idx
+    LEFT JOIN name_index l ON l.locale = p_locale AND l.type = 'last' AND l.idx = r.last_idx
+    ORDER BY r.g;
 END;
 $$;
-
-
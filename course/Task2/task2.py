@@ -1,9 +1,25 @@
 
 import hashlib
 import os
+import sys
+import sqlite3
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
 
 directory = r"C:\Users\SanzharSabyr\Desktop\FP\python\course\Task2(files)"
 
+CHUNK_SIZE = 1 << 20
+CACHE_PATH = os.path.join(os.path.expanduser("~"), ".task2_hash_cache.sqlite")
+SORT_BLOCK = 1 << 16
+# Far above the float64 rounding error of a log-sum over 64-digit hashes
+LOG_EPSILON = 1e-9
+
+# Every factor digit + 1 is 1..16, so a product of them is fully described
+# by its exponents over these primes
+PRIMES = (2, 3, 5, 7, 11, 13)
+
 
 def product_of_digits_plus_one(hex_str):
     product = 1
@@ -12,19 +28,234 @@ def product_of_digits_plus_one(hex_str):
         product *= (digit + 1)
     return product
 
-file_hashes = []
-for filename in os.listdir(directory):
-    filepath = os.path.join(directory, filename)
-    if os.path.isfile(filepath):
-        with open(filepath, 'rb') as f:
-            file_data = f.read()
-            sha3_hash = hashlib.sha3_256(file_data).hexdigest()
-            file_hashes.append(sha3_hash)
 
-file_hashes.sort(key=product_of_digits_plus_one)
+def _prime_exponents(n):
+    exponents = []
+    for p in PRIMES:
+        e = 0
+        while n % p == 0:
+            n //= p
+            e += 1
+        exponents.append(e)
+    return exponents
+
+
+DIGIT_EXPONENTS = [_prime_exponents(d + 1) for d in range(16)]
+
+
+def _exact_product(exponents):
+    product = 1
+    for p, e in zip(PRIMES, exponents):
+        product *= p ** e
+    return product
+
+
+def sort_by_digit_product(hashes):
+    # Same order as sorted(hashes, key=product_of_digits_plus_one) without a
+    # big-integer loop per hash. A hash's product is described exactly by its
+    # exponents over PRIMES; those are packed into one int64 (one field per
+    # prime, wide enough that summing per-digit codes never carries), so
+    # equal keys mean equal products and the stable argsort at the end keeps
+    # input order for ties, like list.sort.
+    if not hashes:
+        return []
+    lengths = set(map(len, hashes))
+    length = lengths.pop()
+    if lengths:
+        return sorted(hashes, key=product_of_digits_plus_one)
+
+    widths = [max(length * e[i] for e in DIGIT_EXPONENTS).bit_length() for i in range(len(PRIMES))]
+    if sum(widths) > 63:
+        return sorted(hashes, key=product_of_digits_plus_one)
+    shifts = np.cumsum([0] + widths[:-1])
+
+    char_codes = np.full(256, -1, dtype=np.int64)
+    for d in range(16):
+        code = int(sum(e << int(s) for e, s in zip(DIGIT_EXPONENTS[d], shifts)))
+        for ch in "%x%X" % (d, d):
+            char_codes[ord(ch)] = code
+
+    raw = np.frombuffer("".join(hashes).encode("ascii"), dtype=np.uint8).reshape(len(hashes), length)
+    keys = np.empty(len(hashes), dtype=np.int64)
+    for start in range(0, len(hashes), SORT_BLOCK):
+        codes = char_codes[raw[start:start + SORT_BLOCK]]
+        if (codes < 0).any():
+            raise ValueError("hash is not a hexadecimal string")
+        keys[start:start + SORT_BLOCK] = codes.sum(axis=1)
+
+    # Rank the distinct keys by log(product); only neighbours whose logs are
+    # too close for float64 to separate are compared as exact integers
+    unique_keys, inverse = np.unique(keys, return_inverse=True)
+    masks = np.array([(1 << w) - 1 for w in widths])
+    exponents = (unique_keys[:, None] >> shifts) & masks
+    logs = exponents @ np.log(PRIMES)
+    ranked = np.argsort(logs)
+    close = np.diff(logs[ranked]) < LOG_EPSILON
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], close, [0])).astype(np.int8)))
+    for start, stop in zip(edges[::2].tolist(), edges[1::2].tolist()):
+        run = ranked[start:stop + 1].tolist()
+        run.sort(key=lambda k: _exact_product(exponents[k].tolist()))
+        ranked[start:stop + 1] = run
+    ranks = np.empty(len(unique_keys), dtype=np.int64)
+    ranks[ranked] = np.arange(len(unique_keys))
+
+    order = np.argsort(ranks[inverse.reshape(-1)], kind="stable")
+    return np.array(hashes, dtype=object)[order].tolist()
+
+
+def hash_file(filepath, chunk_size=CHUNK_SIZE):
+    # Reads into one reusable buffer; hashlib drops the GIL while hashing
+    # large blocks, so several of these can run in parallel threads.
+    sha3 = hashlib.sha3_256()
+    buf = bytearray(chunk_size)
+    view = memoryview(buf)
+    with open(filepath, 'rb') as f:
+        while True:
+            n = f.readinto(buf)
+            if not n:
+                break
+            sha3.update(view[:n])
+    return sha3.hexdigest()
+
+
+def iter_files(directory, recursive=False):
+    # Non-recursive listing keeps os.listdir order, which decides how ties
+    # in the sort key are broken
+    if not recursive:
+        for filename in os.listdir(directory):
+            filepath = os.path.join(directory, filename)
+            if os.path.isfile(filepath):
+                yield filepath
+        return
+    for root, _, files in os.walk(directory):
+        for filename in files:
+            filepath = os.path.join(root, filename)
+            if os.path.isfile(filepath):
+                yield filepath
+
+
+def hash_files(filepaths, workers=None, chunk_size=CHUNK_SIZE):
+    # Results come back in input order regardless of which thread finishes first
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(lambda p: hash_file(p, chunk_size), filepaths))
+
+
+class HashCache:
+    # SQLite index of known digests. An entry is only trusted while the
+    # file's path, size, mtime and inode all still match.
+
+    def __init__(self, path=CACHE_PATH):
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS hashes ("
+            "path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, inode INTEGER, digest TEXT)"
+        )
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.pruned = 0
+
+    def lookup(self, filepath, st):
+        row = self.conn.execute(
+            "SELECT digest FROM hashes WHERE path = ? AND size = ? AND mtime_ns = ? AND inode = ?",
+            (filepath, st.st_size, st.st_mtime_ns, st.st_ino),
+        ).fetchone()
+        return row[0] if row else None
+
+    def store(self, filepath, st, digest):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO hashes (path, size, mtime_ns, inode, digest) VALUES (?, ?, ?, ?, ?)",
+            (filepath, st.st_size, st.st_mtime_ns, st.st_ino, digest),
+        )
+
+    def prune(self, directory, seen, recursive=False):
+        # Forget files that were deleted since the last run
+        prefix = os.path.join(directory, "")
+        rows = self.conn.execute(
+            "SELECT path FROM hashes WHERE substr(path, 1, ?) = ?", (len(prefix), prefix)
+        ).fetchall()
+        gone = [(p,) for (p,) in rows
+                if p not in seen and (recursive or os.path.dirname(p) == directory)]
+        self.conn.executemany("DELETE FROM hashes WHERE path = ?", gone)
+        self.pruned += len(gone)
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+    def stats(self):
+        return f"cache: {self.hits} hits, {self.misses} misses, {self.stale} stale, {self.pruned} pruned"
+
+
+def hash_files_cached(filepaths, cache, workers=None, chunk_size=CHUNK_SIZE, verify=False):
+    # Files are stat'ed before they are read, so a file modified mid-run is
+    # stored under its old mtime and gets rehashed next time.
+    # With verify every file is rehashed and cache entries that disagree
+    # with the fresh digest are counted as stale.
+    filepaths = [os.path.abspath(p) for p in filepaths]
+    stats = [os.stat(p) for p in filepaths]
+    cached = [cache.lookup(p, st) for p, st in zip(filepaths, stats)]
+    todo = [i for i, digest in enumerate(cached) if verify or digest is None]
+    digests = list(cached)
+    for i, digest in zip(todo, hash_files([filepaths[i] for i in todo], workers, chunk_size)):
+        if cached[i] is not None and cached[i] != digest:
+            cache.stale += 1
+        digests[i] = digest
+        cache.store(filepaths[i], stats[i], digest)
+    cache.misses += len(todo)
+    cache.hits += len(filepaths) - len(todo)
+    return digests
+
+
+def final_digest(file_hashes, block=4096):
+    # Equivalent to hashing ''.join(file_hashes), without building the joined
+    # string: digests go into one hasher a block at a time
+    sha3 = hashlib.sha3_256()
+    for start in range(0, len(file_hashes), block):
+        sha3.update(''.join(file_hashes[start:start + block]).encode('utf-8'))
+    return sha3.hexdigest()
+
+
+ORDERS = {
+    "digit_product": sort_by_digit_product,
+    "digest": sorted,
+    "listing": list,
+}
+
+
+def hash_directory(path, order="digit_product", workers=None, recursive=False,
+                   chunk_size=CHUNK_SIZE, cache=None, verify=False):
+    # Library entry point: SHA3-256 over the per-file digests of path, put
+    # in the given order (a name from ORDERS or a function over the list).
+    # Pass a HashCache to reuse digests of unchanged files.
+    sort = ORDERS[order] if isinstance(order, str) else order
+    filepaths = list(iter_files(path, recursive))
+    if cache is None:
+        file_hashes = hash_files(filepaths, workers, chunk_size)
+    else:
+        file_hashes = hash_files_cached(filepaths, cache, workers, chunk_size, verify)
+        cache.prune(os.path.abspath(path), {os.path.abspath(p) for p in filepaths}, recursive)
+    return final_digest(sort(file_hashes))
+
 
-joined_hashes = ''.join(file_hashes)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="SHA3-256 fingerprint of a directory of files")
+    parser.add_argument("directory", nargs="?", default=directory, help="Directory to hash")
+    parser.add_argument("--order", choices=sorted(ORDERS), default="digit_product",
+                        help="How file digests are ordered before the final hash")
+    parser.add_argument("--workers", type=int, default=None, help="Hashing threads (default: CPU count + 4)")
+    parser.add_argument("--recursive", action="store_true", help="Include files in subdirectories")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="Bytes read per block")
+    parser.add_argument("--cache", type=str, default=CACHE_PATH, help="SQLite file with cached digests")
+    parser.add_argument("--no-cache", action="store_true", help="Hash every file without touching the cache")
+    parser.add_argument("--verify", action="store_true", help="Rehash every file and refresh the cache")
+    args = parser.parse_args()
 
-final_hash = hashlib.sha3_256(joined_hashes.encode('utf-8')).hexdigest()
+    cache = None if args.no_cache else HashCache(args.cache)
+    final_hash = hash_directory(args.directory, args.order, args.workers, args.recursive,
+                                args.chunk_size, cache, args.verify)
+    if cache is not None:
+        cache.close()
+        print(cache.stats(), file=sys.stderr)
 
-print(final_hash)
+    print(final_hash)
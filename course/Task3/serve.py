@@ -0,0 +1,71 @@
+
+import os
+import sys
+import argparse
+import multiprocessing
+
+from gunicorn.app.base import BaseApplication
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Same routes either way: the Flask app on synchronous gunicorn workers, or
+# the ASGI version on uvicorn workers managed by gunicorn
+APPS = {
+    "flask": ("task3:app", "sync"),
+    "asgi": ("task3_asgi:app", "uvicorn.workers.UvicornWorker"),
+}
+
+
+def default_workers():
+    return int(os.environ.get("LCM_WORKERS", multiprocessing.cpu_count() * 2 + 1))
+
+
+class LCMServer(BaseApplication):
+
+    def __init__(self, target, options):
+        self.target = target
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            if value is not None and key in self.cfg.settings:
+                self.cfg.set(key, value)
+
+    def load(self):
+        from gunicorn.util import import_app
+        return import_app(self.target)
+
+
+def serve(app="flask", bind="0.0.0.0:5000", workers=None, threads=1,
+          keepalive=5, backlog=2048, log_level="info"):
+    target, worker_class = APPS[app]
+    if HERE not in sys.path:
+        sys.path.insert(0, HERE)
+    LCMServer(target, {
+        "bind": bind,
+        "workers": workers or default_workers(),
+        "worker_class": worker_class,
+        # Threads only apply to the sync worker; "gthread" is picked for > 1
+        "threads": threads,
+        "keepalive": keepalive,
+        "backlog": backlog,
+        "loglevel": log_level,
+        "accesslog": None,
+    }).run()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the LCM service under gunicorn")
+    parser.add_argument("--app", choices=sorted(APPS), default=os.environ.get("LCM_APP", "flask"),
+                        help="Flask app on sync workers or ASGI app on uvicorn workers")
+    parser.add_argument("--bind", type=str, default=os.environ.get("LCM_BIND", "0.0.0.0:5000"),
+                        help="Address to listen on")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: 2 x CPUs + 1)")
+    parser.add_argument("--threads", type=int, default=1, help="Threads per sync worker")
+    parser.add_argument("--keepalive", type=int, default=5, help="Seconds to hold idle keep-alive connections")
+    parser.add_argument("--backlog", type=int, default=2048, help="Pending connections queued by the socket")
+    parser.add_argument("--log-level", type=str, default="info", help="gunicorn log level")
+    args = parser.parse_args()
+
+    serve(args.app, args.bind, args.workers, args.threads, args.keepalive, args.backlog, args.log_level)
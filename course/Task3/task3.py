@@ -1,23 +1,130 @@
 
-from flask import Flask, request
+import os
+import re
+import json
+import time
+from functools import lru_cache, reduce
 from math import gcd
 
+from flask import Flask, Response, request, g, stream_with_context
+
 app = Flask(__name__)
+app.config.update(
+    # Longest accepted argument, checked before int() so oversized numbers
+    # are rejected without any bignum work
+    LCM_MAX_DIGITS=int(os.environ.get("LCM_MAX_DIGITS", "1000")),
+    LCM_CACHE_SIZE=int(os.environ.get("LCM_CACHE_SIZE", "65536")),
+    # Most numbers one batch item may combine into a single LCM
+    LCM_MAX_ARGS=int(os.environ.get("LCM_MAX_ARGS", "100")),
+)
+
+SEPARATORS = re.compile(r"[\s,]+")
+
 
 def lcm(a, b):
     return abs(a * b) // gcd(a, b)
 
-@app.route('/svbyrs_gmail_com', methods=['GET'])
-def compute_lcm():
+
+# lcm is symmetric, so callers pass (min, max) and both orders share an entry
+cached_lcm = lru_cache(maxsize=app.config["LCM_CACHE_SIZE"])(lcm)
+
+
+def parse_arg(raw):
+    if raw is None or len(raw) > app.config["LCM_MAX_DIGITS"]:
+        raise ValueError("missing or too long")
+    return int(raw)
+
+
+def lcm_response(x_raw, y_raw):
+    # Body of the single-pair endpoint, shared with the ASGI variant
     try:
-        x = int(request.args.get('x'))
-        y = int(request.args.get('y'))
+        x = parse_arg(x_raw)
+        y = parse_arg(y_raw)
         if x < 0 or y < 0:
             return "NaN"
-        return str(lcm(x, y))
+        return str(cached_lcm(min(x, y), max(x, y)))
     except (ValueError, TypeError):
         return "NaN"
 
+
+def lcm_of(values):
+    # One batch item: LCM of a whole list, "NaN" under the same rules as the
+    # single-pair endpoint (missing, malformed, oversized or negative input)
+    try:
+        if not isinstance(values, list) or not values or len(values) > app.config["LCM_MAX_ARGS"]:
+            return "NaN"
+        numbers = []
+        for v in values:
+            if type(v) not in (str, int):
+                return "NaN"
+            numbers.append(parse_arg(v if type(v) is str else str(v)))
+        if min(numbers) < 0:
+            return "NaN"
+        if len(numbers) == 2:
+            return str(cached_lcm(min(numbers), max(numbers)))
+        return str(reduce(lcm, numbers))
+    except (ValueError, TypeError, ZeroDivisionError):
+        return "NaN"
+
+
+def batch_item(item):
+    # Anything but a list under "numbers" (e.g. the string "12") is invalid
+    if isinstance(item, dict):
+        if "numbers" in item:
+            return item["numbers"] if isinstance(item["numbers"], list) else []
+        return [item.get("x"), item.get("y")]
+    return item if isinstance(item, list) else [item]
+
+
+def parse_line(line):
+    # NDJSON items, or plain "x y" / "x,y" lines
+    line = line.strip()
+    if line[:1] in ("[", "{"):
+        try:
+            return batch_item(json.loads(line))
+        except ValueError:
+            return []
+    return SEPARATORS.split(line)
+
+
+@app.before_request
+def start_timer():
+    g.started = time.perf_counter()
+
+
+@app.after_request
+def add_timing(response):
+    elapsed_ms = (time.perf_counter() - g.started) * 1000
+    response.headers["Server-Timing"] = f"app;dur={elapsed_ms:.3f}"
+    app.logger.debug("%s %s %.3f ms", request.method, request.full_path, elapsed_ms)
+    return response
+
+
+@app.route('/svbyrs_gmail_com', methods=['GET'])
+def compute_lcm():
+    return lcm_response(request.args.get('x'), request.args.get('y'))
+
+
+@app.route('/svbyrs_gmail_com/batch', methods=['POST'])
+def compute_lcm_batch():
+    # Accepts a JSON array of items ([x, y], [a, b, c, ...], {"x": .., "y": ..}
+    # or {"numbers": [...]}) or a newline-delimited body with one item per
+    # line; results are streamed back one per line as they are computed.
+    if request.is_json:
+        items = request.get_json(silent=True)
+        if not isinstance(items, list):
+            return "NaN"
+        items = (batch_item(item) for item in items)
+    else:
+        items = (parse_line(line.decode("utf-8", errors="replace")) for line in request.stream if line.strip())
+
+    def generate():
+        for values in items:
+            yield lcm_of(values) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype="text/plain")
+
+
 if __name__ == '__main__':
     # Runs on all interfaces, port 5000
     app.run(host='0.0.0.0', port=5000)
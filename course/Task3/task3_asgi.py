@@ -0,0 +1,73 @@
+
+import time
+from urllib.parse import parse_qs
+
+from werkzeug.exceptions import InternalServerError, MethodNotAllowed, NotFound
+
+from task3 import lcm_response
+
+# Plain ASGI version of the /svbyrs_gmail_com route. For that route, bodies,
+# status codes and headers match the Flask app (error pages are Werkzeug's
+# own), so either can sit behind the same clients; the batch endpoint is
+# only served by the Flask app. Run it with serve.py --app asgi or any ASGI
+# server.
+
+ROUTE = "/svbyrs_gmail_com"
+TEXT = b"text/html; charset=utf-8"
+ALLOW = [(b"allow", b"GET, HEAD, OPTIONS")]
+NOT_FOUND = NotFound().get_body()
+METHOD_NOT_ALLOWED = MethodNotAllowed().get_body()
+SERVER_ERROR = InternalServerError().get_body()
+
+
+async def send_text(send, status, body, started, extra=(), head=False):
+    # HEAD answers carry the headers of the GET response but no body
+    body = body.encode("utf-8")
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", TEXT),
+            (b"content-length", str(len(body)).encode()),
+            (b"server-timing", f"app;dur={elapsed_ms:.3f}".encode()),
+            *extra,
+        ],
+    })
+    await send({"type": "http.response.body", "body": b"" if head else body})
+
+
+async def app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+    if scope["type"] != "http":
+        return
+
+    started = time.perf_counter()
+    head = scope["method"] == "HEAD"
+    if scope["path"] != ROUTE:
+        await send_text(send, 404, NOT_FOUND, started, head=head)
+        return
+    if scope["method"] == "OPTIONS":
+        await send_text(send, 200, "", started, ALLOW)
+        return
+    if scope["method"] not in ("GET", "HEAD"):
+        await send_text(send, 405, METHOD_NOT_ALLOWED, started, ALLOW)
+        return
+
+    # Like request.args.get(): first value of each key, None when absent
+    args = parse_qs(scope["query_string"].decode("latin-1"), keep_blank_values=True)
+    x = args.get("x", [None])[0]
+    y = args.get("y", [None])[0]
+    try:
+        body = lcm_response(x, y)
+    except ZeroDivisionError:
+        await send_text(send, 500, SERVER_ERROR, started, head=head)
+        return
+    await send_text(send, 200, body, started, head=head)
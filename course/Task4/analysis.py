@@ -0,0 +1,187 @@
+import os
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, FrozenSet, List
+
+import pandas as pd
+
+from ingest import normalize_column, read_folder
+from prices import PRICE_CACHE_FILE, PriceCache, to_usd_factorized
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DATA_FOLDERS = [os.path.join(HERE, "data", name) for name in ("DATA1", "DATA2", "DATA3")]
+TOP_N = 10
+
+
+def normalize(df: pd.DataFrame) -> pd.DataFrame:
+    df.columns = [normalize_column(col) for col in df.columns]
+    return df
+
+
+def author_set(value) -> FrozenSet[str]:
+    return frozenset(a.strip() for a in str(value).split(",") if a.strip())
+
+
+class Timer:
+    # Wall time of each named stage, in the order the stages ran
+
+    def __init__(self):
+        self.stages: Dict[str, float] = {}
+        self._last = time.perf_counter()
+
+    def lap(self, stage: str):
+        now = time.perf_counter()
+        self.stages[stage] = now - self._last
+        self._last = now
+
+
+def load_frames(folder: str, ingest_cache: bool = True):
+    users_df, books_df, orders_df = read_folder(folder, ingest_cache)
+    return normalize(users_df), normalize(books_df), normalize(orders_df)
+
+
+def merge_frames(users_df: pd.DataFrame, books_df: pd.DataFrame, orders_df: pd.DataFrame):
+    user_key = [c for c in orders_df.columns if "user" in c][0]
+    book_key = [c for c in orders_df.columns if "book" in c][0]
+    merged_df = (
+        orders_df
+        .merge(users_df, left_on=user_key, right_on="id", how="left", suffixes=("", "_user"))
+        .merge(books_df, left_on=book_key, right_on="id", how="left", suffixes=("", "_book"))
+    )
+    return merged_df, user_key
+
+
+def collect_values(df: pd.DataFrame, keyword: str) -> List:
+    return sorted({v for v in df.filter(like=keyword).values.flatten() if pd.notna(v)})
+
+
+def top_author_sets(merged_df: pd.DataFrame, top_n: int) -> pd.DataFrame:
+    # Quantities are summed per distinct author string first, so each string
+    # is split into a set once rather than once per order
+    quantity = merged_df.groupby("author", dropna=True)["quantity"].sum()
+    sets = pd.Series([author_set(a) for a in quantity.index], index=quantity.index)
+    quantity = quantity[sets.map(len) > 0]
+    return (
+        quantity.groupby(sets[quantity.index].to_numpy(), sort=False).sum()
+                .rename_axis("author_set")
+                .reset_index()
+                .sort_values("quantity", ascending=False)
+                .head(top_n)
+    )
+
+
+def run_analysis(folder: str, top_n: int = TOP_N, price_cache: bool = True, ingest_cache: bool = True) -> Dict:
+    # Every metric the task4_data scripts print, from one merged frame:
+    # daily revenue and its top 5 days, the distinct author sets of the
+    # catalogue, the best-selling author sets and the top customer.
+    # "timings" holds the seconds spent in each stage.
+    timer = Timer()
+    users_df, books_df, orders_df = load_frames(folder, ingest_cache)
+    timer.lap("load")
+
+    merged_df, user_key = merge_frames(users_df, books_df, orders_df)
+    timer.lap("merge")
+
+    cache = PriceCache(os.path.join(folder, PRICE_CACHE_FILE)) if price_cache else None
+    merged_df["quantity"] = pd.to_numeric(merged_df["quantity"], errors="coerce").fillna(0)
+    unit_price_usd = pd.to_numeric(to_usd_factorized(merged_df["unit_price"], cache), errors="coerce").fillna(0)
+    merged_df["paid_price"] = (merged_df["quantity"] * unit_price_usd).round(2)
+    if cache is not None:
+        cache.save()
+    timer.lap("prices")
+
+    result = {"folder": folder, "rows": len(merged_df)}
+    if "timestamp" in merged_df.columns:
+        timestamps = pd.to_datetime(merged_df["timestamp"], errors="coerce", dayfirst=False, utc=True)
+        merged_df["date"] = timestamps.dt.date
+        result["valid_timestamps"] = int(timestamps.notna().sum())
+    timer.lap("dates")
+
+    if "date" in merged_df.columns and merged_df["date"].notna().any():
+        daily_revenue = (
+            merged_df.groupby("date", dropna=True)["paid_price"]
+            .sum()
+            .reset_index()
+            .rename(columns={"paid_price": "total_revenue"})
+        )
+        result["daily_revenue"] = daily_revenue
+        result["top_5_days"] = daily_revenue.sort_values(by="total_revenue", ascending=False).head(5)
+    timer.lap("daily_revenue")
+
+    if "author" in books_df.columns:
+        result["author_sets"] = set(books_df["author"].dropna().map(author_set))
+    if "author" in merged_df.columns:
+        result["top_author_sets"] = top_author_sets(merged_df, top_n)
+    timer.lap("author_sets")
+
+    by_user = merged_df.groupby(user_key)["paid_price"].sum()
+    if not by_user.empty:
+        top_id = by_user.idxmax()
+        top_rows = merged_df[merged_df[user_key] == top_id]
+        result["top_customer"] = {
+            "user_id": top_id,
+            "total": float(by_user[top_id]),
+            "emails": collect_values(top_rows, "email"),
+            "phones": collect_values(top_rows, "phone"),
+            "addresses": collect_values(top_rows, "address"),
+            "names": collect_values(top_rows, "name"),
+        }
+    timer.lap("top_customer")
+
+    result["timings"] = timer.stages
+    return result
+
+
+def print_report(result: Dict, examples: int = 5):
+    print(f"== {result['folder']} ({result['rows']} orders)")
+    if "valid_timestamps" in result:
+        print(f"Parsed {result['valid_timestamps']} valid timestamps out of {result['rows']} rows.")
+
+    if "top_5_days" in result:
+        print("\nTop 5 days by revenue:")
+        print(result["top_5_days"])
+    else:
+        print("Cannot compute daily revenue because 'date' column was not created or has no valid values.")
+
+    if "author_sets" in result:
+        print(f"Number of unique author sets: {len(result['author_sets'])}")
+        print("Examples of unique author sets:")
+        for s in list(result["author_sets"])[:examples]:
+            print(s)
+
+    if "top_author_sets" in result:
+        print(f"Top {len(result['top_author_sets'])} author sets by sold book count:")
+        for _, row in result["top_author_sets"].iterrows():
+            print(f"- {list(row['author_set'])} — {int(row['quantity'])} books sold")
+
+    if "top_customer" in result:
+        top = result["top_customer"]
+        print(f" Top customer: user_id={top['user_id']}, total spending=${top['total']:,.2f}")
+        print(f"- emails: {top['emails']}")
+        print(f"- phones: {top['phones']}")
+        print(f"- addresses: {top['addresses']}")
+        print(f"- names: {top['names']}")
+
+    print("Stage timings: " + ", ".join(f"{k} {v:.2f}s" for k, v in result["timings"].items()))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Analyse several FP data folders in parallel")
+    parser.add_argument("folders", nargs="*", default=DATA_FOLDERS,
+                        help="Folders with users.csv, books.yaml and orders.parquet (default: data/DATA1-3)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: one per folder)")
+    parser.add_argument("--top", type=int, default=TOP_N, help="Author sets to list")
+    parser.add_argument("--no-price-cache", action="store_true", help="Parse every price instead of reusing the cache")
+    parser.add_argument("--no-ingest-cache", action="store_true",
+                        help="Read users.csv and books.yaml instead of their Parquet copies")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers or len(args.folders)) as pool:
+        futures = [pool.submit(run_analysis, folder, args.top, not args.no_price_cache,
+                               not args.no_ingest_cache) for folder in args.folders]
+        for future in futures:
+            print_report(future.result())
+            print()
+    print(f"Analysed {len(args.folders)} folders in {time.perf_counter() - start:.2f}s")
@@ -0,0 +1,78 @@
+
+import time
+import random
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from prices import to_usd, to_usd_factorized, to_usd_series
+
+CURRENCIES = ["$", "USD", "usd", "US$", "us$", "€", "EUR", "eur", "Euro", "EURO", "", "", "¢"]
+SEPARATORS = ["", " ", " ", "  ", "\t"]
+JUNK = ["", "", "abc", "price:", "~", "-", "+", ".", ",", "/", "ea", "٣"]
+
+
+def random_number(rng):
+    whole = str(rng.randrange(0, 10 ** rng.randrange(1, 7)))
+    if rng.random() < 0.3 and len(whole) > 3:
+        whole = f"{int(whole):,}"
+    frac = "".join(rng.choice("0123456789") for _ in range(rng.randrange(0, 4)))
+    sep = rng.choice([".", ",", "¢", "."])
+    sign = rng.choice(["", "", "", "-", "+"])
+    return sign + whole + (sep + frac if frac or rng.random() < 0.1 else "")
+
+
+def random_price(rng):
+    # Random arrangements of currency markers, numbers, separators and junk
+    kind = rng.random()
+    if kind < 0.03:
+        return None
+    if kind < 0.05:
+        return np.nan
+    if kind < 0.08:
+        return rng.choice([rng.randrange(100), rng.random() * 100, np.int64(7), np.float32(2.5), True])
+    parts = [rng.choice(JUNK), rng.choice(CURRENCIES), random_number(rng), rng.choice(CURRENCIES)]
+    if rng.random() < 0.2:
+        parts.append(random_number(rng))
+    rng.shuffle(parts)
+    return rng.choice(SEPARATORS).join(parts)
+
+
+def corpus(size, distinct, seed):
+    # Real order data repeats a small set of price strings many times
+    rng = random.Random(seed)
+    pool = [random_price(rng) for _ in range(distinct)]
+    return pd.Series([rng.choice(pool) for _ in range(size)], dtype=object)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check to_usd_series against to_usd and time both")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Prices in the corpus")
+    parser.add_argument("--distinct", type=int, default=5_000, help="Distinct price values in the corpus")
+    parser.add_argument("--seed", type=int, default=0, help="Corpus seed")
+    args = parser.parse_args()
+
+    prices = corpus(args.rows, args.distinct, args.seed)
+
+    start = time.perf_counter()
+    expected = prices.apply(to_usd).astype(float)
+    row_wise = time.perf_counter() - start
+
+    start = time.perf_counter()
+    actual = to_usd_series(prices)
+    column_wise = time.perf_counter() - start
+
+    start = time.perf_counter()
+    factorized = to_usd_factorized(prices)
+    by_code = time.perf_counter() - start
+
+    same = np.array_equal(expected.to_numpy(), actual.to_numpy(), equal_nan=True)
+    same_factorized = np.array_equal(expected.to_numpy(), factorized.to_numpy(), equal_nan=True)
+    mismatches = prices[~((expected == actual) | (expected.isna() & actual.isna()))]
+    print(f"{args.rows} prices, {args.distinct} distinct: identical={same}, mismatches={len(mismatches)}, "
+          f"factorized identical={same_factorized}")
+    for value in mismatches.unique()[:10]:
+        print(f"  {value!r}: to_usd={to_usd(value)!r} to_usd_series={to_usd_series(pd.Series([value]))[0]!r}")
+    print(f"apply(to_usd) {row_wise:.2f}s  to_usd_series {column_wise:.2f}s  x{row_wise / column_wise:.1f}  "
+          f"to_usd_factorized {by_code:.2f}s  x{row_wise / by_code:.1f}")
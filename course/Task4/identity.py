@@ -0,0 +1,125 @@
+from typing import Dict, List, Set
+
+import pandas as pd
+
+# Identity values that link two user ids to the same person. Names are not
+# among them: distinct people share names, and linking on them transitively
+# joins almost every user into one component.
+LINK_KEYS = ("email", "phone", "address")
+NAME_COLUMNS = ["name", "full_name", "fullname", "display_name"]
+
+
+def best_display_name(row: pd.Series) -> str:
+
+    candidates = []
+    for col in NAME_COLUMNS:
+        if col in row and pd.notna(row[col]) and str(row[col]).strip():
+            candidates.append(str(row[col]).strip())
+
+    first = str(row.get("first_name", "") or "").strip()
+    last  = str(row.get("last_name", "") or "").strip()
+    if first or last:
+        candidates.append((first + " " + last).strip())
+
+
+    for col in [c for c in row.index if "email" in c]:
+        val = str(row[col]).strip()
+        if val:
+            candidates.append(val)
+            break
+
+    for c in candidates:
+        if c:
+            return c
+    return ""
+
+
+def _text(value) -> str:
+    # Numbers read from CSV columns with gaps are floats; 5551234.0 is 5551234
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def normalize_values(key: str, values: pd.Series) -> pd.Series:
+    # Case and spacing never tell two people apart; phones compare by digits
+    values = values.map(_text).astype(str).str.split().str.join(" ").str.casefold()
+    if key == "phone":
+        values = values.str.replace(r"\D", "", regex=True)
+    return values
+
+
+class UnionFind:
+
+    def __init__(self, size: int):
+        self.parent = list(range(size))
+        self.size = [1] * size
+
+    def find(self, x: int) -> int:
+        parent = self.parent
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    def union(self, a: int, b: int):
+        a, b = self.find(a), self.find(b)
+        if a == b:
+            return
+        if self.size[a] < self.size[b]:
+            a, b = b, a
+        self.parent[b] = a
+        self.size[a] += self.size[b]
+
+
+class IdentityIndex:
+    # Groups the user ids of a frame into people. Every normalized value of
+    # the LINK_KEYS columns maps to the ids it appears with, and ids sharing
+    # any value end up in one union-find component, so the aliases of every
+    # user are known after a single pass over the distinct rows.
+
+    def __init__(self, df: pd.DataFrame, user_key: str, keys=LINK_KEYS):
+        uids = df[user_key].astype(str)
+        self.codes: Dict[str, int] = {uid: i for i, uid in enumerate(pd.unique(uids))}
+        self.uids: List[str] = list(self.codes)
+        self.index: Dict[str, Dict[str, Set[str]]] = {}
+        self._sets = UnionFind(len(self.uids))
+
+        for key in keys:
+            values_to_ids: Dict[str, Set[str]] = {}
+            for col in [c for c in df.columns if key in c]:
+                pairs = pd.DataFrame({"uid": uids, "value": df[col]}).dropna().drop_duplicates()
+                pairs["value"] = normalize_values(key, pairs["value"])
+                pairs = pairs[pairs["value"] != ""]
+                for uid, value in zip(pairs["uid"], pairs["value"]):
+                    values_to_ids.setdefault(value, set()).add(uid)
+            for ids in values_to_ids.values():
+                first, *rest = (self.codes[uid] for uid in ids)
+                for other in rest:
+                    self._sets.union(first, other)
+            self.index[key] = values_to_ids
+
+        # Display name of each id: the first of its rows that has one
+        self.names: Dict[str, str] = {}
+        name_cols = [c for c in df.columns if c in NAME_COLUMNS or c in ("first_name", "last_name") or "email" in c]
+        if name_cols:
+            rows = df[name_cols].assign(_uid=uids).drop_duplicates()
+            names = rows[name_cols].apply(best_display_name, axis=1)
+            names = names[names != ""]
+            self.names = names.groupby(rows.loc[names.index, "_uid"], sort=False).first().to_dict()
+
+        self._components: Dict[int, List[str]] = {}
+        for uid, code in self.codes.items():
+            self._components.setdefault(self._sets.find(code), []).append(uid)
+
+    def aliases(self, uid: str) -> List[str]:
+        # Every id of the person behind uid, uid included, sorted
+        if uid not in self.codes:
+            return [uid]
+        return sorted(self._components[self._sets.find(self.codes[uid])])
+
+    def name(self, uid: str) -> str:
+        return self.names.get(uid, "")
+
+    def people(self) -> List[List[str]]:
+        return [sorted(ids) for ids in self._components.values()]
@@ -0,0 +1,161 @@
+import os
+import re
+import sys
+import json
+import hashlib
+from typing import Iterable, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import yaml
+
+# libyaml is several times faster than the pure Python loader and builds
+# the same objects; fall back when PyYAML was installed without it
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+# Converted sources are only reused while these match the ones they were
+# made with; bump INGEST_VERSION whenever the conversion changes
+INGEST_VERSION = "2"
+INGEST_CACHE_DIR = ".ingest_cache"
+
+# Columns the dashboards read, as keywords of the normalized column names
+# (same matching as the "user" / "book" key lookups). Identity columns are
+# kept from every source because the top-customer lookups scan all of them;
+# users keep every column.
+IDENTITY_COLUMNS = ("email", "phone", "address", "name")
+ORDER_COLUMNS = ("id", "user", "book", "quantity", "price", "timestamp") + IDENTITY_COLUMNS
+BOOK_COLUMNS = ("id", "author") + IDENTITY_COLUMNS
+
+
+def normalize_column(col: str) -> str:
+    return re.sub(r'[^0-9a-zA-Z]+', '_', col).strip('_').lower()
+
+
+def _wanted(columns: Iterable[str], keywords: Optional[Iterable[str]]):
+    if keywords is None:
+        return list(columns)
+    return [c for c in columns if any(k in normalize_column(c) for k in keywords)]
+
+
+def _file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _read_csv(path: str) -> pd.DataFrame:
+    return pd.read_csv(path)
+
+
+def _read_yaml(path: str) -> pd.DataFrame:
+    with open(path, "r", encoding="utf-8") as f:
+        return pd.DataFrame(yaml.load(f, Loader=YAML_LOADER))
+
+
+READERS = {".csv": _read_csv, ".yaml": _read_yaml, ".yml": _read_yaml}
+
+
+class IngestCache:
+    # Parquet copies of the text sources of one data folder, kept in
+    # INGEST_CACHE_DIR. A copy is reused while the source size and mtime are
+    # unchanged, or, after a touch or checkout, while its sha256 still is.
+
+    def __init__(self, folder: str):
+        self.dir = os.path.join(folder, INGEST_CACHE_DIR)
+
+    def _stamp(self, source: str, digest: Optional[str] = None) -> dict:
+        st = os.stat(source)
+        return {"version": INGEST_VERSION, "size": st.st_size, "mtime_ns": st.st_mtime_ns,
+                "sha256": digest or _file_hash(source)}
+
+    def _cached_stamp(self, path: str) -> Optional[dict]:
+        try:
+            metadata = pq.read_schema(path).metadata or {}
+            return json.loads(metadata[b"ingest"])
+        except (OSError, KeyError, ValueError, pa.ArrowException):
+            return None
+
+    def _is_fresh(self, source: str, path: str) -> bool:
+        cached = self._cached_stamp(path)
+        if not cached or cached.get("version") != INGEST_VERSION:
+            return False
+        st = os.stat(source)
+        if cached.get("size") == st.st_size and cached.get("mtime_ns") == st.st_mtime_ns:
+            return True
+        if cached.get("size") != st.st_size:
+            return False
+        digest = _file_hash(source)
+        if cached.get("sha256") != digest:
+            return False
+        # Same content under a new mtime: restamp so later runs skip the hash
+        try:
+            self._write(pq.read_table(path), source, path, digest)
+        except (OSError, pa.ArrowException) as e:
+            print(f"Could not restamp {path}: {e}", file=sys.stderr)
+        return True
+
+    def _write(self, table: pa.Table, source: str, path: str, digest: Optional[str] = None):
+        stamp = json.dumps(self._stamp(source, digest))
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}), b"ingest": stamp.encode()})
+        os.makedirs(self.dir, exist_ok=True)
+        pq.write_table(table, path + ".tmp")
+        os.replace(path + ".tmp", path)
+
+    def _convert(self, source: str, path: str, df: pd.DataFrame):
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        nested = [f.name for f in table.schema
+                  if pa.types.is_nested(f.type) and not pa.types.is_list(f.type)]
+        if nested:
+            raise pa.ArrowInvalid(f"nested columns {nested} would not load back unchanged")
+        self._write(table, source, path)
+
+    def _read(self, path: str, columns: Optional[Iterable[str]]) -> pd.DataFrame:
+        schema = pq.read_schema(path)
+        wanted = _wanted(schema.names, columns)
+        df = pd.read_parquet(path, columns=wanted)
+        # List cells come back as NumPy arrays; the readers produced lists
+        lists = [name for name in wanted if pa.types.is_list(schema.field(name).type)]
+        if lists:
+            table = pq.read_table(path, columns=lists)
+            for name in lists:
+                df[name] = pd.Series(table.column(name).to_pylist(), index=df.index, dtype=object)
+        return df
+
+    def load(self, source: str, columns: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        path = os.path.join(self.dir, os.path.basename(source) + ".parquet")
+        if self._is_fresh(source, path):
+            return self._read(path, columns)
+
+        df = READERS[os.path.splitext(source)[1].lower()](source)
+        try:
+            self._convert(source, path, df)
+        except (OSError, pa.ArrowException) as e:
+            # e.g. a YAML column mixing numbers and strings has no Arrow type
+            print(f"Could not cache {source}: {e}", file=sys.stderr)
+        return df[_wanted(df.columns, columns)]
+
+
+def read_source(folder: str, name: str, columns: Optional[Iterable[str]] = None,
+                cache: Optional[IngestCache] = None) -> pd.DataFrame:
+    # One source of a data folder with only the columns matching `columns`.
+    # Parquet sources are read directly with column projection; CSV and YAML
+    # go through the cache when one is given.
+    source = os.path.join(folder, name)
+    if name.endswith(".parquet"):
+        return pd.read_parquet(source, columns=_wanted(pq.read_schema(source).names, columns))
+    if cache is None:
+        df = READERS[os.path.splitext(source)[1].lower()](source)
+        return df[_wanted(df.columns, columns)]
+    return cache.load(source, columns)
+
+
+def read_folder(folder: str, cache: bool = True):
+    # users, books and orders frames of a data folder, columns as in the files
+    ingest = IngestCache(folder) if cache else None
+    users_df = read_source(folder, "users.csv", None, ingest)
+    books_df = read_source(folder, "books.yaml", BOOK_COLUMNS, ingest)
+    orders_df = read_source(folder, "orders.parquet", ORDER_COLUMNS)
+    return users_df, books_df, orders_df
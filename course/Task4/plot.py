@@ -1,58 +1,23 @@
 
 import os
-import re
-import yaml
 import argparse
 from datetime import datetime
-from typing import List, Dict, Set
+from typing import List
 
-import numpy as np
 import pandas as pd
 import plotly.express as px
 
+from identity import IdentityIndex
+from ingest import normalize_column, read_folder
+from prices import PRICE_CACHE_FILE, PriceCache, to_usd_factorized
+
 
 def normalize(df: pd.DataFrame) -> pd.DataFrame:
     
     df = df.copy()
-    df.columns = [re.sub(r'[^0-9a-zA-Z]+', '_', col).strip('_').lower() for col in df.columns]
+    df.columns = [normalize_column(col) for col in df.columns]
     return df
 
-EURO_TO_USD = 1.2
-
-def normalize_number_token(s: str) -> str:
-    
-    s = s.replace("\u00A0", " ").strip()
-    s = s.replace("¢", ".")
-    if "," in s and "." not in s:
-        s = s.replace(",", ".")
-    elif "," in s and "." in s:
-        s = s.replace(",", "")
-    s = re.sub(r"\s+", " ", s)
-    return s
-
-def to_usd(value):
-    
-    if pd.isna(value):
-        return np.nan
-    if isinstance(value, (int, float, np.integer, np.floating)):
-        return float(value)
-
-    s = normalize_number_token(str(value))
-    s_lower = s.lower()
-
-    has_usd = bool(re.search(r"(\$|usd|us\$)", s_lower))
-    has_eur = bool(re.search(r"(€|eur|euro)", s_lower))
-
-    s_num = re.sub(r"(usd|us\$|eur|euro|\$|€)", " ", s_lower, flags=re.IGNORECASE)
-    s_num = normalize_number_token(s_num)
-
-    m = re.search(r"[-+]?\d+(?:\.\d+)?", s_num)
-    if not m:
-        return np.nan
-    val = float(m.group(0))
-    return val * EURO_TO_USD if has_eur and not has_usd else val
-
-
 def normalize_authors(val) -> List[str]:
     
     if val is None or (isinstance(val, float) and pd.isna(val)):
@@ -64,49 +29,10 @@ def normalize_authors(val) -> List[str]:
     return sorted(set(items))
 
 
-def collect_values(df: pd.DataFrame, keyword: str) -> Set[str]:
-    
-    vals = set()
-    for col in df.columns:
-        if keyword in col:
-            for v in df[col].dropna().astype(str).tolist():
-                vv = v.strip()
-                if vv:
-                    vals.add(vv)
-    return vals
-
-def best_display_name(row: pd.Series) -> str:
-    
-    candidates = []
-    for col in ["name", "full_name", "fullname", "display_name"]:
-        if col in row and pd.notna(row[col]) and str(row[col]).strip():
-            candidates.append(str(row[col]).strip())
-
-    first = str(row.get("first_name", "") or "").strip()
-    last  = str(row.get("last_name", "") or "").strip()
-    if first or last:
-        candidates.append((first + " " + last).strip())
-
-    
-    for col in [c for c in row.index if "email" in c]:
-        val = str(row[col]).strip()
-        if val:
-            candidates.append(val)
-            break
-
-    for c in candidates:
-        if c:
-            return c
-    return ""
-
-
-def build_dashboard(folder_path: str, output_html: str = "dashboard.html") -> str:
+def build_dashboard(folder_path: str, output_html: str = "dashboard.html", price_cache: bool = True,
+                    ingest_cache: bool = True) -> str:
     
-    users_df = pd.read_csv(os.path.join(folder_path, "users.csv"))
-    with open(os.path.join(folder_path, "books.yaml"), "r", encoding="utf-8") as f:
-        books_data = yaml.safe_load(f)
-    books_df = pd.DataFrame(books_data)
-    orders_df = pd.read_parquet(os.path.join(folder_path, "orders.parquet"))
+    users_df, books_df, orders_df = read_folder(folder_path, ingest_cache)
 
     
     users_df = normalize(users_df)
@@ -132,7 +58,11 @@ def build_dashboard(folder_path: str, output_html: str = "dashboard.html") -> st
 
     
     merged_df["quantity"] = pd.to_numeric(merged_df["quantity"], errors="coerce").fillna(0)
-    merged_df["unit_price_usd"] = pd.to_numeric(merged_df["unit_price"].apply(to_usd), errors="coerce").fillna(0)
+    cache = PriceCache(os.path.join(folder_path, PRICE_CACHE_FILE)) if price_cache else None
+    unit_price_usd = to_usd_factorized(merged_df["unit_price"], cache)
+    if cache is not None:
+        cache.save()
+    merged_df["unit_price_usd"] = pd.to_numeric(unit_price_usd, errors="coerce").fillna(0)
     merged_df["paid_price"] = (merged_df["quantity"] * merged_df["unit_price_usd"]).round(2)
 
     
@@ -189,50 +119,19 @@ def build_dashboard(folder_path: str, output_html: str = "dashboard.html") -> st
         alias_names_list = []
     else:
         
-        top_id = by_user.sort_values("paid_price", ascending=False).iloc[0][user_key]
-        top_rows = merged_df[merged_df[user_key] == top_id]
-
-        
-        keys = ["email", "phone", "address", "name"]
-        id_values: Dict[str, Set[str]] = {k: collect_values(top_rows, k) for k in keys}
-
-        
-        alias_ids: Set[str] = {str(top_id)}
-        for k in keys:
-            if not id_values[k]:
-                continue
-            match_cols = [c for c in merged_df.columns if k in c]
-            for c in match_cols:
-                values = merged_df[c].astype(str).str.strip()
-                mask = values.isin(id_values[k])
-                alias_ids.update(merged_df.loc[mask, user_key].astype(str).tolist())
-        best_buyer_aliases = sorted(alias_ids)
+        top_id = by_user.sort_values("paid_price", ascending=False)[user_key].iloc[0]
 
         
-        def name_for_id(uid: str) -> str:
-            rows = merged_df[merged_df[user_key].astype(str) == str(uid)]
-            for _, r in rows.iterrows():
-                nm = best_display_name(r)
-                if nm:
-                    return nm
-            return ""
+        identities = IdentityIndex(merged_df, user_key)
+        best_buyer_aliases = identities.aliases(str(top_id))
 
         
-        best_buyer_name = name_for_id(str(top_id))
+        best_buyer_name = identities.name(str(top_id))
         if not best_buyer_name:
-            for aid in best_buyer_aliases:
-                nm = name_for_id(aid)
-                if nm:
-                    best_buyer_name = nm
-                    break
+            best_buyer_name = next((nm for nm in map(identities.name, best_buyer_aliases) if nm), "")
 
         
-        alias_names: Set[str] = set()
-        for aid in best_buyer_aliases:
-            nm = name_for_id(aid)
-            if nm:
-                alias_names.add(nm)
-        alias_names_list = sorted(alias_names)
+        alias_names_list = sorted({identities.name(aid) for aid in best_buyer_aliases} - {""})
 
     
     daily_chart = daily_revenue.sort_values("date").copy()
@@ -342,7 +241,11 @@ if __name__ == "__main__":
     parser.add_argument("--folder", type=str, required=True,
                         help="Path to DATA1 folder (users.csv, books.yaml, orders.parquet)")
     parser.add_argument("--out", type=str, default="dashboard.html", help="Output HTML file path")
+    parser.add_argument("--no-price-cache", action="store_true",
+                        help=f"Parse every price instead of reusing {PRICE_CACHE_FILE} in the data folder")
+    parser.add_argument("--no-ingest-cache", action="store_true",
+                        help="Read users.csv and books.yaml instead of their Parquet copies in the data folder")
     args = parser.parse_args()
 
-    out = build_dashboard(args.folder, args.out)
+    out = build_dashboard(args.folder, args.out, not args.no_price_cache, not args.no_ingest_cache)
     print(f"Saved dashboard to: {out}")
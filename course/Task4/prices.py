@@ -0,0 +1,187 @@
+import os
+import re
+import sys
+from itertools import repeat
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+EURO_TO_USD = 1.2
+
+NUMBER = r"(?P<number>[-+]?\p{Nd}+(?:\.\p{Nd}+)?)"
+OTHER_DIGITS = r"[^0-9\P{Nd}]"
+NUMERIC_TYPES = (int, float, np.integer, np.floating)
+
+
+def normalize_number_token(s: str) -> str:
+
+    s = s.replace("\u00A0", " ").strip()
+    s = s.replace("¢", ".")
+    if "," in s and "." not in s:
+        s = s.replace(",", ".")
+    elif "," in s and "." in s:
+        s = s.replace(",", "")
+    s = re.sub(r"\s+", " ", s)
+    return s
+
+
+def to_usd(value):
+
+    if pd.isna(value):
+        return np.nan
+    if isinstance(value, NUMERIC_TYPES):
+        return float(value)
+
+    s = normalize_number_token(str(value))
+    s_lower = s.lower()
+
+    has_usd = bool(re.search(r"(\$|usd|us\$)", s_lower))
+    has_eur = bool(re.search(r"(€|eur|euro)", s_lower))
+
+    s_num = re.sub(r"(usd|us\$|eur|euro|\$|€)", " ", s_lower, flags=re.IGNORECASE)
+    s_num = normalize_number_token(s_num)
+
+    m = re.search(r"[-+]?\d+(?:\.\d+)?", s_num)
+    if not m:
+        return np.nan
+    val = float(m.group(0))
+    return val * EURO_TO_USD if has_eur and not has_usd else val
+
+
+def _text_to_usd(text: pd.Series) -> np.ndarray:
+    # Whitespace and the currency words never take part in the number match,
+    # so only the "¢" and comma rewrites of normalize_number_token() have to
+    # be applied before searching for it. Each step is one Arrow kernel.
+    arr = pa.array(text, type=pa.string(), from_pandas=True)
+    if isinstance(arr, pa.ChunkedArray):
+        arr = arr.combine_chunks()
+    arr = pc.replace_substring(arr, "¢", ".")
+    arr = pc.if_else(pc.match_substring(arr, "."),
+                     pc.replace_substring(arr, ",", ""),
+                     pc.replace_substring(arr, ",", "."))
+
+    lower = pc.utf8_lower(arr)
+    has_usd = pc.or_(pc.match_substring(lower, "$"), pc.match_substring(lower, "usd"))
+    has_eur = pc.or_(pc.match_substring(lower, "€"), pc.match_substring(lower, "eur"))
+    euro = pc.and_(has_eur, pc.invert(has_usd)).to_numpy(zero_copy_only=False)
+
+    # re's \d matches any Unicode decimal digit, hence \p{Nd}; the few
+    # numbers that are not plain ASCII are converted by float() instead
+    number = pc.struct_field(pc.extract_regex(arr, NUMBER), [0])
+    other_digits = pc.fill_null(pc.match_substring_regex(number, OTHER_DIGITS), False)
+    ascii_number = pc.if_else(other_digits, pa.scalar(None, pa.string()), number)
+    amounts = pc.cast(ascii_number, pa.float64()).to_numpy(zero_copy_only=False, writable=True)
+    other = np.flatnonzero(other_digits.to_numpy(zero_copy_only=False))
+    amounts[other] = [float(n) for n in number.take(other).to_pylist()]
+    amounts[euro] *= EURO_TO_USD
+    return amounts
+
+
+def to_usd_series(values: pd.Series) -> pd.Series:
+    # Column-wise to_usd() with identical results (see bench_prices.py)
+    values = pd.Series(values)
+    if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+        return values.astype(float)
+
+    result = np.full(len(values), np.nan)
+    present = values.notna().to_numpy()
+    if pd.api.types.infer_dtype(values, skipna=True) in ("string", "empty"):
+        numeric = np.zeros(len(values), dtype=bool)
+    else:
+        numeric = np.fromiter(map(isinstance, values.to_numpy(dtype=object), repeat(NUMERIC_TYPES)),
+                              dtype=bool, count=len(values))
+        numeric &= present
+        result[numeric] = [float(v) for v in values[numeric]]
+
+    text = present & ~numeric
+    if text.any():
+        result[text] = _text_to_usd(values[text].astype(str))
+    return pd.Series(result, index=values.index)
+
+
+# Cached conversions are only reused while these match the ones they were
+# made with; bump PARSER_VERSION whenever to_usd() changes behaviour
+PARSER_VERSION = "1"
+PRICE_CACHE_FILE = ".price_cache.parquet"
+
+
+class PriceCache:
+    # Persistent price string -> USD map, stored as a two-column Parquet
+    # file next to the data, so reruns only parse strings not seen before
+
+    def __init__(self, path: str):
+        self.path = path
+        self.values: Dict[str, float] = {}
+        self.added = 0
+        self.hits = 0
+        stamp = self._stamp()
+        if os.path.exists(path):
+            try:
+                table = pq.read_table(path)
+            except (OSError, pa.ArrowException):
+                return
+            if (table.schema.metadata or {}).get(b"stamp") == stamp:
+                self.values = dict(zip(table.column("price").to_pylist(), table.column("usd").to_pylist()))
+
+    @staticmethod
+    def _stamp() -> bytes:
+        return f"{PARSER_VERSION}:{EURO_TO_USD!r}".encode()
+
+    def lookup(self, prices: List[str]) -> List[Optional[float]]:
+        found = [self.values.get(p) for p in prices]
+        self.hits += sum(v is not None for v in found)
+        return found
+
+    def update(self, prices: List[str], usd: np.ndarray):
+        self.values.update(zip(prices, usd.tolist()))
+        self.added += len(prices)
+
+    def save(self):
+        if not self.added:
+            return
+        table = pa.table({"price": list(self.values), "usd": list(self.values.values())},
+                         schema=pa.schema([("price", pa.string()), ("usd", pa.float64())],
+                                          metadata={"stamp": self._stamp()}))
+        try:
+            pq.write_table(table, self.path + ".tmp")
+            os.replace(self.path + ".tmp", self.path)
+        except OSError as e:
+            print(f"Could not save price cache {self.path}: {e}", file=sys.stderr)
+        self.added = 0
+
+
+def to_usd_factorized(values: pd.Series, cache: Optional[PriceCache] = None) -> pd.Series:
+    # Same as to_usd_series(), but each distinct value is converted once and
+    # the results are mapped back by code. Strings already in the cache are
+    # not parsed at all.
+    values = pd.Series(values)
+    if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+        return values.astype(float)
+
+    codes, uniques = pd.factorize(values)
+    uniques = pd.Series(uniques, dtype=object)
+    usd = np.full(len(uniques), np.nan)
+
+    is_text = np.fromiter(map(isinstance, uniques, repeat(str)), dtype=bool, count=len(uniques))
+    todo = ~is_text
+    if cache is not None:
+        text_pos = np.flatnonzero(is_text)
+        found = cache.lookup(uniques[is_text].tolist())
+        known = np.array([v is not None for v in found], dtype=bool)
+        usd[text_pos[known]] = [v for v in found if v is not None]
+        todo[text_pos[~known]] = True
+    else:
+        todo |= is_text
+
+    if todo.any():
+        usd[todo] = to_usd_series(uniques[todo]).to_numpy()
+        if cache is not None:
+            new_text = todo & is_text
+            cache.update(uniques[new_text].tolist(), usd[new_text])
+
+    result = np.where(codes >= 0, usd[np.maximum(codes, 0)], np.nan) if len(usd) else np.full(len(codes), np.nan)
+    return pd.Series(result, index=values.index)
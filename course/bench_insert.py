@@ -0,0 +1,45 @@
+
+import time
+import argparse
+from itertools import islice, cycle
+
+import psycopg2
+
+import insert
+
+
+def synthetic_rows(rows, count):
+    # Cycle the sample with fresh ids so every row is a distinct primary key
+    for i, row in enumerate(islice(cycle(rows), count)):
+        yield (i,) + row[1:]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare rows/second of the insert.py load strategies")
+    parser.add_argument("--dsn", type=str, default=insert.DB, help="PostgreSQL connection string")
+    parser.add_argument("--input", type=str, default="task1_d_clean.json", help="Sample books (JSON / JSON Lines)")
+    parser.add_argument("--rows", type=int, default=100_000, help="Rows loaded per strategy")
+    parser.add_argument("--batch-size", type=int, default=insert.BATCH_SIZE, help="Rows per batch")
+    parser.add_argument("--methods", nargs="+", choices=insert.METHODS, default=list(insert.METHODS))
+    args = parser.parse_args()
+
+    rows = list(insert.book_rows(insert.load_books(args.input)))
+    conn = psycopg2.connect(args.dsn)
+    with conn.cursor() as cur:
+        insert.create_table(cur, "books_bench")
+    conn.commit()
+
+    for method in args.methods:
+        with conn.cursor() as cur:
+            cur.execute("TRUNCATE books_bench")
+        conn.commit()
+        start = time.perf_counter()
+        count = insert.insert_books(conn, synthetic_rows(rows, args.rows), method, args.batch_size, "books_bench")
+        conn.commit()
+        elapsed = time.perf_counter() - start
+        print(f"{method:<12} {count:>10} rows {elapsed:8.2f}s {count / elapsed:12,.0f} rows/s")
+
+    with conn.cursor() as cur:
+        cur.execute("DROP TABLE books_bench")
+    conn.commit()
+    conn.close()
@@ -0,0 +1,52 @@
+
+import os
+import time
+import argparse
+import tempfile
+
+import read
+
+
+def make_dump(source, path, records):
+    # Repeat the sample records until the synthetic dump is large enough
+    with open(source, "rb") as f:
+        body = f.read().strip()[1:-1]
+    sample = body.count(b"{:id=>")
+    with open(path, "wb") as out:
+        out.write(b"[")
+        for i in range(-(-records // sample)):
+            out.write(b", " + body if i else body)
+        out.write(b"]")
+    return -(-records // sample) * sample
+
+
+def run(path, output, workers):
+    start = time.perf_counter()
+    if workers == 1:
+        with open(output, "w", encoding="utf-8") as f:
+            count = read.write_jsonl(read.iter_books(path), f)
+    else:
+        count = read.convert_parallel(path, output, "jsonl", workers)
+    return count, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark read.py parsing across worker counts")
+    parser.add_argument("--source", type=str, default="task1_d.json", help="Sample dump to replicate")
+    parser.add_argument("--records", type=int, default=1_000_000, help="Records in the synthetic dump")
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count(), help="Largest worker count to try")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        dump = os.path.join(tmp, "dump.rb")
+        output = os.path.join(tmp, "out.jsonl")
+        records = make_dump(args.source, dump, args.records)
+        print(f"{records} records, {os.path.getsize(dump) / 1e6:.1f} MB, {os.cpu_count()} CPUs")
+
+        counts = sorted({2 ** i for i in range(args.max_workers.bit_length())} | {args.max_workers})
+        baseline = None
+        for workers in counts:
+            count, elapsed = run(dump, output, workers)
+            baseline = baseline or elapsed
+            print(f"workers={workers:<3} {elapsed:8.2f}s  {count / elapsed:12,.0f} rec/s  "
+                  f"speedup x{baseline / elapsed:.2f}")
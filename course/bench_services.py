@@ -0,0 +1,212 @@
+
+import os
+import sys
+import json
+import logging
+import random
+import asyncio
+import argparse
+import platform
+import threading
+import importlib
+import importlib.util
+from urllib.parse import urlencode
+
+import loadtest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+TASK3 = os.path.join(HERE, "Task3")
+TASK6 = os.path.join(HERE, "Task 6")
+HOST = "127.0.0.1"
+MODES = ("closed", "fixed")
+SERVERS = ("inprocess", "local")
+THRESHOLD = 0.2
+
+
+def users_requests(seed=0):
+    # Form posts like the ones the page sends, over random seeds and batches
+    rng = random.Random(seed)
+    while True:
+        form = {
+            "locale": rng.choice(("en_US", "de_DE")),
+            "seed": rng.randrange(1000),
+            "batch_index": rng.randrange(100),
+            "action": rng.choice(("generate", "next")),
+        }
+        yield "POST", "/", urlencode(form).encode("ascii")
+
+
+def load_module(name, path):
+    # "Task 6" is not an importable package name, so load its files by path
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def lcm_app():
+    if TASK3 not in sys.path:
+        sys.path.insert(0, TASK3)
+    return importlib.import_module("task3").app
+
+
+def lcm_asgi_app():
+    lcm_app()
+    return importlib.import_module("task3_asgi").app
+
+
+def users_app():
+    if TASK6 not in sys.path:
+        sys.path.insert(0, TASK6)
+    return load_module("task6_app", os.path.join(TASK6, "app.py")).app
+
+
+def lcm_command(app):
+    def command(bind, workers):
+        return [sys.executable, os.path.join(TASK3, "serve.py"), "--app", app, "--bind", bind,
+                "--workers", str(workers), "--log-level", "warning"]
+    return command
+
+
+def users_command(bind, workers):
+    return [sys.executable, "-m", "gunicorn", "--chdir", TASK6, "--bind", bind,
+            "--workers", str(workers), "--log-level", "warning", "app:app"]
+
+
+# name: (loader for in-process runs, "wsgi"/"asgi", gunicorn command, requests)
+TARGETS = {
+    "lcm": (lcm_app, "wsgi", lcm_command("flask"), loadtest.lcm_requests),
+    "lcm-asgi": (lcm_asgi_app, "asgi", lcm_command("asgi"), loadtest.lcm_requests),
+    "users": (users_app, "wsgi", users_command, users_requests),
+}
+
+
+class InProcessServer:
+    # Serves an app from a background thread of this process: WSGI apps on
+    # werkzeug's threaded server, ASGI apps on uvicorn.
+
+    def __init__(self, app, kind):
+        self.port = loadtest.free_port()
+        if kind == "wsgi":
+            from werkzeug.serving import make_server
+            # Per-request access log lines would cost more than the requests
+            logging.getLogger("werkzeug").setLevel(logging.WARNING)
+            self.server = make_server(HOST, self.port, app, threaded=True)
+            self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        else:
+            import uvicorn
+            config = uvicorn.Config(app, host=HOST, port=self.port, log_level="warning", lifespan="off")
+            self.server = uvicorn.Server(config)
+            self.thread = threading.Thread(target=self.server.run, daemon=True)
+        self.kind = kind
+
+    def __enter__(self):
+        self.thread.start()
+        loadtest.wait_for_port(HOST, self.port, None)
+        return self
+
+    def __exit__(self, *exc):
+        if self.kind == "wsgi":
+            self.server.shutdown()
+        else:
+            self.server.should_exit = True
+        self.thread.join(timeout=10)
+
+
+class LocalServer:
+    # Runs the app under gunicorn in a separate process on a free port
+
+    def __init__(self, command, workers, env):
+        self.port = loadtest.free_port()
+        self.command = command(f"{HOST}:{self.port}", workers)
+        self.env = env
+
+    def __enter__(self):
+        self.proc = loadtest.spawn(self.command, HOST, self.port, self.env)
+        return self
+
+    def __exit__(self, *exc):
+        loadtest.stop_server(self.proc)
+
+
+def run_scenario(target, mode, args):
+    loader, kind, command, requests = TARGETS[target]
+    if args.server == "inprocess":
+        server = InProcessServer(loader(), kind)
+    else:
+        server = LocalServer(command, args.workers, dict(os.environ))
+    with server:
+        if mode == "closed":
+            run = loadtest.closed_loop(HOST, server.port, requests(), args.concurrency, args.duration,
+                                       args.warmup, not args.no_keepalive)
+        else:
+            run = loadtest.fixed_rate(HOST, server.port, requests(), args.rate, args.duration,
+                                      args.concurrency, args.warmup, not args.no_keepalive)
+        latencies, errors, elapsed = asyncio.run(run)
+    result = loadtest.summarize(f"{target}/{mode}", latencies, errors, elapsed)
+    result["histogram_ms"] = loadtest.histogram(latencies)
+    return result
+
+
+def compare(results, baseline, threshold):
+    # A scenario regresses when its p99 grows or its throughput drops by
+    # more than threshold (a fraction) against the stored baseline
+    previous = {r["name"]: r for r in baseline["results"]}
+    failures = []
+    for r in results:
+        base = previous.get(r["name"])
+        if base is None:
+            print(f"{r['name']}: no baseline", file=sys.stderr)
+            continue
+        if r["p99_ms"] > base["p99_ms"] * (1 + threshold):
+            failures.append(f"{r['name']}: p99 {r['p99_ms']:.2f} ms vs baseline {base['p99_ms']:.2f} ms")
+        if r["rps"] < base["rps"] * (1 - threshold):
+            failures.append(f"{r['name']}: {r['rps']:.1f} req/s vs baseline {base['rps']:.1f} req/s")
+        if r["errors"] > base["errors"]:
+            failures.append(f"{r['name']}: {r['errors']} errors vs baseline {base['errors']}")
+    return failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the Flask services and check for regressions")
+    parser.add_argument("--targets", nargs="+", choices=sorted(TARGETS), default=["lcm", "lcm-asgi"],
+                        help="Apps to benchmark ('users' needs the Task 6 database, see FAKE_USERS_DSN)")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES),
+                        help="Closed loop (clients wait for answers) and/or fixed request rate")
+    parser.add_argument("--server", choices=SERVERS, default="local",
+                        help="Serve from a thread of this process or under gunicorn on a local port")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="gunicorn workers (local server)")
+    parser.add_argument("--concurrency", type=int, default=32, help="Clients / connections in parallel")
+    parser.add_argument("--rate", type=float, default=500.0, help="Requests per second in fixed mode")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds measured per scenario")
+    parser.add_argument("--warmup", type=float, default=1.0, help="Seconds of load before measuring")
+    parser.add_argument("--no-keepalive", action="store_true", help="Open a new connection per request")
+    parser.add_argument("--output", type=str, default="bench_results.json", help="Where to write the results")
+    parser.add_argument("--baseline", type=str, default=None, help="Earlier results to compare against")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD,
+                        help="Allowed relative slowdown before a scenario fails (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    results = []
+    for target in args.targets:
+        for mode in args.modes:
+            r = run_scenario(target, mode, args)
+            results.append(r)
+            print(f"{r['name']:>16}: {r['rps']:9.1f} req/s  p50 {r['p50_ms']:7.2f} ms  "
+                  f"p99 {r['p99_ms']:7.2f} ms  {r['requests']} ok, {r['errors']} errors")
+
+    report = {
+        "settings": {k: v for k, v in vars(args).items() if k not in ("output", "baseline")},
+        "machine": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()},
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=4)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            failures = compare(results, json.load(f), args.threshold)
+        for failure in failures:
+            print(f"REGRESSION {failure}", file=sys.stderr)
+        if failures:
+            sys.exit(1)
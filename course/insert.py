@@ -1,43 +1,310 @@
 
+import io
+import os
+import re
+import sys
 import json
+import argparse
+from decimal import Decimal
+from itertools import islice
+
 import psycopg2
+import psycopg2.extras
+from psycopg2 import sql
 
-# Load JSON
-with open(r"C:\Users\SanzharSabyr\Desktop\FP\python\course\task1_d_clean.json", "r", encoding="utf-8") as f:
-    books = json.load(f)
-
-# Connect to PostgreSQL
-conn = psycopg2.connect(
-    dbname="course_db",
-    user="postgres",
-    password="1128327",
-    host="localhost",
-    port="5432"
-)
-cur = conn.cursor()
+HERE = os.path.dirname(os.path.abspath(__file__))
+JSON_PATH = os.path.join(HERE, "task1_d_clean.json")
+SUMMARY_SQL = os.path.join(HERE, "CREATE TABLE summary AS.sql")
+DB = os.environ.get("BOOKS_DSN", "dbname=course_db user=postgres password=1128327 host=localhost port=5432")
+
+BOOK_COLUMNS = ("id", "title", "author", "genre", "publisher", "year", "price")
+PRICE_COLUMNS = ("price_amount", "price_currency", "price_usd")
+COLUMNS = BOOK_COLUMNS + PRICE_COLUMNS
+BATCH_SIZE = 10000
+METHODS = ("copy", "values", "executemany")
 
-# Create table with NUMERIC id
-cur.execute("""
-CREATE TABLE IF NOT EXISTS books (
-    id NUMERIC PRIMARY KEY,
+CURRENCIES = {"$": "USD", "€": "EUR"}
+TO_USD = {"USD": Decimal("1"), "EUR": Decimal("1.2")}
+# Shared by parse_price() and BACKFILL_PRICES so both load paths agree; the
+# classes are spelled out because \s and \d differ between re and PostgreSQL
+PRICE_PATTERN = r"^[ \t\n\r\f\v]*([$€])[ \t\n\r\f\v]*([0-9]+(?:\.[0-9]+)?)[ \t\n\r\f\v]*$"
+PRICE = re.compile(PRICE_PATTERN)
+
+# ids are unsigned 64-bit values, which overflow BIGINT, hence NUMERIC(20, 0)
+CREATE_TABLE = """
+CREATE TABLE IF NOT EXISTS {table} (
+    id NUMERIC(20, 0) PRIMARY KEY,
     title TEXT,
     author TEXT,
     genre TEXT,
     publisher TEXT,
     year INT,
-    price TEXT
+    price TEXT,
+    price_amount NUMERIC(12, 2),
+    price_currency CHAR(3),
+    price_usd NUMERIC(14, 4),
+    row_hash TEXT
 )
-""")
+"""
+
+# Brings tables created by older versions of this script up to date. Each
+# ALTER takes an ACCESS EXCLUSIVE lock, so it only runs when the column is
+# missing or, for id, has a different precision/scale.
+ID_TYPE = (20, 0)
+ID_MIGRATION = "ALTER TABLE {table} ALTER COLUMN id TYPE NUMERIC(20, 0)"
+MIGRATIONS = [
+    ("row_hash", "ALTER TABLE {table} ADD COLUMN IF NOT EXISTS row_hash TEXT"),
+    ("price_amount", "ALTER TABLE {table} ADD COLUMN IF NOT EXISTS price_amount NUMERIC(12, 2)"),
+    ("price_currency", "ALTER TABLE {table} ADD COLUMN IF NOT EXISTS price_currency CHAR(3)"),
+    ("price_usd", "ALTER TABLE {table} ADD COLUMN IF NOT EXISTS price_usd NUMERIC(14, 4)"),
+]
+
+BACKFILL_PRICES = """
+UPDATE {table} SET
+    price_amount = parsed.amount,
+    price_currency = parsed.currency,
+    price_usd = parsed.amount * CASE parsed.currency WHEN 'EUR' THEN 1.2 ELSE 1 END
+FROM (
+    SELECT id,
+           m[2]::NUMERIC AS amount,
+           CASE m[1] WHEN '€' THEN 'EUR' WHEN '$' THEN 'USD' END AS currency
+    FROM (SELECT id, regexp_match(price, {pattern}) AS m FROM {table}) AS matched
+) AS parsed
+WHERE {table}.id = parsed.id
+"""
+
+# year carries price_usd so the per-year summary can use an index-only scan
+INDEXES = [
+    "CREATE INDEX IF NOT EXISTS {name} ON {table} (year) INCLUDE (price_usd)",
+    "CREATE INDEX IF NOT EXISTS {name} ON {table} (genre)",
+    "CREATE INDEX IF NOT EXISTS {name} ON {table} (author)",
+]
+
+# Content hash of the book columns, used to skip rows that did not change.
+# A trigger keeps it filled for every write to books, including plain COPY
+# loads, so the first incremental run after a full load finds nothing to do.
+ROW_HASH = "md5(ROW(title, author, genre, publisher, year, price)::text)"
+
+ROW_HASH_FUNCTION = """
+CREATE OR REPLACE FUNCTION books_row_hash() RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    NEW.row_hash := md5(ROW(NEW.title, NEW.author, NEW.genre, NEW.publisher, NEW.year, NEW.price)::text);
+    RETURN NEW;
+END;
+$$
+"""
+
+ROW_HASH_TRIGGER = """
+CREATE TRIGGER {name} BEFORE INSERT OR UPDATE ON {table}
+    FOR EACH ROW EXECUTE FUNCTION books_row_hash()
+"""
+
+# Hashes of rows written before the trigger existed are filled in once
+BACKFILL_ROW_HASH = f"UPDATE {{table}} SET row_hash = {ROW_HASH} WHERE row_hash IS NULL"
+
+# When an id is staged more than once the last occurrence wins, as it would
+# with row-by-row upserts
+CREATE_STAGE = "CREATE TEMP TABLE books_stage (LIKE books INCLUDING DEFAULTS, stage_order BIGSERIAL) ON COMMIT DROP"
+
+MERGE_STAGE = f"""
+WITH merged AS (
+    INSERT INTO books AS b ({", ".join(COLUMNS)}, row_hash)
+    SELECT DISTINCT ON (id) {", ".join(COLUMNS)}, {ROW_HASH}
+    FROM books_stage
+    ORDER BY id, stage_order DESC
+    ON CONFLICT (id) DO UPDATE SET
+        {", ".join(f"{c} = EXCLUDED.{c}" for c in COLUMNS[1:])},
+        row_hash = EXCLUDED.row_hash
+    WHERE b.row_hash IS DISTINCT FROM EXCLUDED.row_hash
+    RETURNING (xmax = 0) AS inserted
+)
+SELECT
+    (SELECT count(*) FROM merged WHERE inserted),
+    (SELECT count(*) FROM merged WHERE NOT inserted),
+    (SELECT count(DISTINCT id) FROM books_stage)
+"""
+
+
+def create_table(cur, table="books"):
+    ident = sql.Identifier(table)
+    cur.execute("SELECT to_regclass(%s) IS NOT NULL", (table,))
+    existed = cur.fetchone()[0]
+    cur.execute(
+        "SELECT column_name, numeric_precision, numeric_scale FROM information_schema.columns "
+        "WHERE table_schema = current_schema() AND table_name = %s", (table,))
+    columns = {name: (precision, scale) for name, precision, scale in cur.fetchall()}
+    cur.execute(sql.SQL(CREATE_TABLE).format(table=ident))
+    if existed and columns.get("id") != ID_TYPE:
+        cur.execute(sql.SQL(ID_MIGRATION).format(table=ident))
+    for column, statement in MIGRATIONS:
+        if existed and column not in columns:
+            cur.execute(sql.SQL(statement).format(table=ident))
+    # Prices of rows loaded before the typed columns existed are parsed once
+    if existed and "price_usd" not in columns:
+        cur.execute(sql.SQL(BACKFILL_PRICES).format(table=ident, pattern=sql.Literal(PRICE_PATTERN)))
+    for statement, column in zip(INDEXES, ("year", "genre", "author")):
+        cur.execute(sql.SQL(statement).format(name=sql.Identifier(f"{table}_{column}_idx"), table=ident))
+
+    trigger = f"{table}_row_hash"
+    cur.execute("SELECT 1 FROM pg_trigger WHERE tgrelid = to_regclass(%s) AND tgname = %s", (table, trigger))
+    if cur.fetchone() is None:
+        cur.execute(ROW_HASH_FUNCTION)
+        cur.execute(sql.SQL(ROW_HASH_TRIGGER).format(name=sql.Identifier(trigger), table=ident))
+        cur.execute(sql.SQL(BACKFILL_ROW_HASH).format(table=ident))
+
+
+def create_summary(cur):
+    # Installs the trigger-maintained per-year summary over books
+    with open(SUMMARY_SQL, "r", encoding="utf-8") as f:
+        cur.execute(f.read())
+
+
+def parse_price(price):
+    # The dump parser accepts any value here, e.g. :price=>5 or nil
+    if not isinstance(price, str):
+        return None, None, None
+    m = PRICE.match(price)
+    if m is None:
+        return None, None, None
+    currency = CURRENCIES[m.group(1)]
+    amount = Decimal(m.group(2))
+    return amount, currency, amount * TO_USD[currency]
+
+
+def load_books(path):
+    # JSON Lines are streamed line by line; a JSON array has to be loaded whole
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from json.load(f)
+
+
+def book_rows(books):
+    # Prices are parsed here, once per load, rather than in every query
+    for b in books:
+        yield tuple(b[c] for c in BOOK_COLUMNS) + parse_price(b["price"])
+
+
+def copy_escape(value):
+    if value is None:
+        return "\\N"
+    return (str(value).replace("\\", "\\\\").replace("\t", "\\t")
+            .replace("\n", "\\n").replace("\r", "\\r"))
+
+
+class RowStream(io.TextIOBase):
+    # File-like object that renders rows in COPY text format on demand, so
+    # copy_expert() never sees more than one read() worth of data at a time.
+
+    def __init__(self, rows):
+        self._lines = ("\t".join(map(copy_escape, row)) + "\n" for row in rows)
+        self._pending = ""
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        parts = [self._pending]
+        length = len(self._pending)
+        for line in self._lines:
+            parts.append(line)
+            length += len(line)
+            if 0 <= size <= length:
+                break
+        data = "".join(parts)
+        if size < 0:
+            self._pending = ""
+            return data
+        self._pending = data[size:]
+        return data[:size]
+
+
+def batches(rows, batch_size):
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def insert_batch(cur, batch, method, table="books"):
+    columns = sql.SQL(", ").join(map(sql.Identifier, COLUMNS))
+    if method == "copy":
+        query = sql.SQL("COPY {} ({}) FROM STDIN").format(sql.Identifier(table), columns)
+        cur.copy_expert(query.as_string(cur), RowStream(batch))
+    elif method == "values":
+        query = sql.SQL("INSERT INTO {} ({}) VALUES %s").format(sql.Identifier(table), columns)
+        psycopg2.extras.execute_values(cur, query.as_string(cur), batch, page_size=len(batch))
+    else:
+        query = sql.SQL("INSERT INTO {} ({}) VALUES ({})").format(
+            sql.Identifier(table), columns, sql.SQL(", ").join(sql.Placeholder() * len(COLUMNS)))
+        cur.executemany(query.as_string(cur), batch)
+
+
+def insert_books(conn, rows, method="copy", batch_size=BATCH_SIZE, table="books"):
+    # Rows are pulled from the iterator one batch at a time. If COPY is
+    # refused on the first batch (e.g. by a proxy) the load falls back to
+    # execute_values paging.
+    count = 0
+    with conn.cursor() as cur:
+        for batch in batches(rows, batch_size):
+            if method == "copy" and count == 0:
+                cur.execute("SAVEPOINT first_batch")
+                try:
+                    insert_batch(cur, batch, method, table)
+                except (psycopg2.NotSupportedError, psycopg2.ProgrammingError) as e:
+                    cur.execute("ROLLBACK TO SAVEPOINT first_batch")
+                    reason = str(e).splitlines()[0]
+                    print(f"COPY failed ({reason}); falling back to execute_values", file=sys.stderr)
+                    method = "values"
+                    insert_batch(cur, batch, method, table)
+            else:
+                insert_batch(cur, batch, method, table)
+            count += len(batch)
+    return count
+
+
+def upsert_books(conn, rows, method="copy", batch_size=BATCH_SIZE):
+    # Stage everything into a temp table, then merge it with one
+    # INSERT ... ON CONFLICT that only rewrites ids whose hash changed.
+    with conn.cursor() as cur:
+        cur.execute(CREATE_STAGE)
+    insert_books(conn, rows, method, batch_size, "books_stage")
+    with conn.cursor() as cur:
+        cur.execute(MERGE_STAGE)
+        inserted, updated, staged = cur.fetchone()
+    return inserted, updated, staged - inserted - updated
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load books into PostgreSQL")
+    parser.add_argument("--input", type=str, default=JSON_PATH, help="Books as a JSON array or JSON Lines")
+    parser.add_argument("--dsn", type=str, default=DB, help="PostgreSQL connection string (or set BOOKS_DSN)")
+    parser.add_argument("--method", choices=METHODS, default="copy",
+                        help="COPY FROM STDIN, execute_values paging or row-by-row executemany")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Rows per COPY statement / page")
+    parser.add_argument("--mode", choices=["full", "incremental"], default="full",
+                        help="Plain insert, or stage and upsert only new/changed rows")
+    args = parser.parse_args()
 
-# Insert data
-data_list = [(b["id"], b["title"], b["author"], b["genre"], b["publisher"], b["year"], b["price"]) for b in books]
-cur.executemany("""
-INSERT INTO books (id, title, author, genre, publisher, year, price)
-VALUES (%s, %s, %s, %s, %s, %s, %s)
-""", data_list)
+    # Connect to PostgreSQL
+    conn = psycopg2.connect(args.dsn)
+    with conn.cursor() as cur:
+        create_table(cur)
+        create_summary(cur)
 
-conn.commit()
-cur.close()
-conn.close()
+    rows = book_rows(load_books(args.input))
+    if args.mode == "incremental":
+        inserted, updated, unchanged = upsert_books(conn, rows, args.method, args.batch_size)
+    else:
+        inserted, updated, unchanged = insert_books(conn, rows, args.method, args.batch_size), 0, 0
+    conn.commit()
+    conn.close()
 
-print(f" Inserted {len(data_list)} records into PostgreSQL")
+    print(f" Inserted {inserted}, updated {updated}, unchanged {unchanged} records in PostgreSQL")
@@ -0,0 +1,257 @@
+
+import os
+import sys
+import time
+import json
+import bisect
+import random
+import socket
+import asyncio
+import argparse
+import statistics
+import subprocess
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SERVE = os.path.join(HERE, "Task3", "serve.py")
+LCM_PATH = "/svbyrs_gmail_com"
+
+
+class Connection:
+    # Minimal HTTP/1.1 client over one keep-alive socket. Reconnects when
+    # the server closes the connection, which gunicorn's sync workers do
+    # after every response.
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+
+    async def request(self, method, path, body=b"", keepalive=True):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        head = f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\n"
+        if body:
+            head += f"Content-Type: application/x-www-form-urlencoded\r\nContent-Length: {len(body)}\r\n"
+        if not keepalive:
+            head += "Connection: close\r\n"
+        self.writer.write(head.encode("latin-1") + b"\r\n" + body)
+        await self.writer.drain()
+        head = await self.reader.readuntil(b"\r\n\r\n")
+        lines = head.decode("latin-1").split("\r\n")
+        status = int(lines[0].split()[1])
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                key, value = line.split(":", 1)
+                headers[key.strip().lower()] = value.strip()
+        if "content-length" in headers:
+            body = await self.reader.readexactly(int(headers["content-length"]))
+        else:
+            body = await self.reader.read()
+            headers["connection"] = "close"
+        if not keepalive or headers.get("connection", "").lower() == "close":
+            await self.close()
+        return status, body
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except OSError:
+                pass
+        self.reader = self.writer = None
+
+
+def lcm_requests(seed=0, digits=6):
+    # Endless (method, path, body) stream of random pairs for the LCM route
+    rng = random.Random(seed)
+    top = 10 ** digits
+    while True:
+        yield "GET", f"{LCM_PATH}?x={rng.randrange(1, top)}&y={rng.randrange(1, top)}", b""
+
+
+async def closed_loop(host, port, requests, concurrency, duration, warmup=0.0, keepalive=True):
+    # Every client sends its next request as soon as the previous answer
+    # arrives; latencies of requests finished during warmup are dropped.
+    latencies = []
+    errors = 0
+    started = time.perf_counter()
+    measure_from = started + warmup
+    deadline = measure_from + duration
+
+    async def client():
+        nonlocal errors
+        conn = Connection(host, port)
+        try:
+            while time.perf_counter() < deadline:
+                t0 = time.perf_counter()
+                try:
+                    status, _ = await conn.request(*next(requests), keepalive=keepalive)
+                except (OSError, asyncio.IncompleteReadError):
+                    await conn.close()
+                    status = None
+                t1 = time.perf_counter()
+                if t1 < measure_from:
+                    continue
+                if status == 200:
+                    latencies.append(t1 - t0)
+                else:
+                    errors += 1
+        finally:
+            await conn.close()
+
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return latencies, errors, time.perf_counter() - measure_from
+
+
+async def fixed_rate(host, port, requests, rate, duration, concurrency, warmup=0.0, keepalive=True):
+    # Open loop: requests are issued on a fixed schedule whether or not
+    # earlier ones have finished, over at most `concurrency` connections.
+    # Latency runs from the scheduled send time, so time spent waiting for a
+    # free connection is counted instead of hidden (coordinated omission).
+    idle = asyncio.Queue()
+    for _ in range(concurrency):
+        idle.put_nowait(Connection(host, port))
+    latencies = []
+    errors = 0
+    started = time.perf_counter()
+    measure_from = started + warmup
+
+    async def one(due, request):
+        nonlocal errors
+        conn = await idle.get()
+        try:
+            status, _ = await conn.request(*request, keepalive=keepalive)
+        except (OSError, asyncio.IncompleteReadError):
+            await conn.close()
+            status = None
+        finally:
+            idle.put_nowait(conn)
+        if due < measure_from:
+            return
+        if status == 200:
+            latencies.append(time.perf_counter() - due)
+        else:
+            errors += 1
+
+    tasks = []
+    for i in range(int(rate * (warmup + duration))):
+        due = started + i / rate
+        delay = due - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(one(due, next(requests))))
+    await asyncio.gather(*tasks)
+    while not idle.empty():
+        await idle.get_nowait().close()
+    return latencies, errors, time.perf_counter() - measure_from
+
+
+# Upper bounds of the latency histogram buckets, in milliseconds
+HISTOGRAM_BOUNDS_MS = (0.25, 0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+
+def histogram(latencies):
+    counts = [0] * (len(HISTOGRAM_BOUNDS_MS) + 1)
+    for latency in latencies:
+        counts[bisect.bisect_left(HISTOGRAM_BOUNDS_MS, latency * 1000)] += 1
+    labels = [f"<={b}" for b in HISTOGRAM_BOUNDS_MS] + [f">{HISTOGRAM_BOUNDS_MS[-1]}"]
+    return dict(zip(labels, counts))
+
+
+def percentile(values, q):
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+
+def summarize(name, latencies, errors, elapsed):
+    return {
+        "name": name,
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / elapsed if elapsed > 0 else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "mean_ms": statistics.fmean(latencies) * 1000 if latencies else float("nan"),
+        "max_ms": max(latencies) * 1000 if latencies else float("nan"),
+    }
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_for_port(host, port, proc, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc is not None and proc.poll() is not None:
+            raise RuntimeError(f"server exited with code {proc.returncode}")
+        try:
+            with socket.create_connection((host, port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"server did not start listening on {host}:{port}")
+
+
+def start_server(app, workers, host="127.0.0.1"):
+    # Runs Task3/serve.py in its own process on a free local port
+    port = free_port()
+    command = [sys.executable, SERVE, "--app", app, "--bind", f"{host}:{port}",
+               "--workers", str(workers), "--log-level", "warning"]
+    return spawn(command, host, port), port
+
+
+def spawn(command, host, port, env=None):
+    proc = subprocess.Popen(command, stdout=subprocess.DEVNULL, env=env)
+    try:
+        wait_for_port(host, port, proc)
+    except BaseException:
+        stop_server(proc)
+        raise
+    return proc
+
+
+def stop_server(proc):
+    proc.terminate()
+    try:
+        proc.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.wait()
+
+
+def run(app, workers, concurrency, duration, warmup, host="127.0.0.1"):
+    proc, port = start_server(app, workers, host)
+    try:
+        latencies, errors, elapsed = asyncio.run(
+            closed_loop(host, port, lcm_requests(), concurrency, duration, warmup))
+    finally:
+        stop_server(proc)
+    return summarize(app, latencies, errors, elapsed)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load-test the Flask and ASGI variants of the LCM service")
+    parser.add_argument("--apps", nargs="+", choices=["flask", "asgi"], default=["flask", "asgi"],
+                        help="Variants to start and measure")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Server worker processes")
+    parser.add_argument("--concurrency", type=int, default=64, help="Clients sending requests in parallel")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds measured per variant")
+    parser.add_argument("--warmup", type=float, default=1.0, help="Seconds of load before measuring")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    results = [run(app, args.workers, args.concurrency, args.duration, args.warmup) for app in args.apps]
+    if args.json:
+        print(json.dumps(results, indent=4))
+    else:
+        for r in results:
+            print(f"{r['name']:>6}: {r['rps']:9.1f} req/s  p50 {r['p50_ms']:7.2f} ms  "
+                  f"p99 {r['p99_ms']:7.2f} ms  {r['requests']} ok, {r['errors']} errors")
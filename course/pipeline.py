@@ -0,0 +1,102 @@
+
+import sys
+import queue
+import argparse
+import threading
+
+import psycopg2
+
+import read
+import insert
+
+QUEUE_SIZE = 8
+DONE = object()
+
+
+def _put(q, item, stop):
+    # Give up once the writer has stopped, instead of blocking on a full queue
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            pass
+    return False
+
+
+def produce(books, q, stop, batch_size):
+    try:
+        for batch in insert.batches(insert.book_rows(books), batch_size):
+            if not _put(q, batch, stop):
+                return
+    except BaseException as e:
+        _put(q, e, stop)
+        return
+    _put(q, DONE, stop)
+
+
+def consume(q):
+    while True:
+        item = q.get()
+        if item is DONE:
+            return
+        if isinstance(item, BaseException):
+            raise item
+        yield from item
+
+
+def run_pipeline(books, dsn, mode="full", batch_size=insert.BATCH_SIZE, queue_size=QUEUE_SIZE):
+    # The parser runs in its own thread and hands row batches to the COPY
+    # writer through a bounded queue, so parsing and loading overlap while
+    # at most queue_size batches are held in memory.
+    q = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+    parser_thread = threading.Thread(target=produce, args=(books, q, stop, batch_size), daemon=True)
+    conn = psycopg2.connect(dsn)
+    try:
+        with conn.cursor() as cur:
+            insert.create_table(cur)
+            insert.create_summary(cur)
+        parser_thread.start()
+        rows = consume(q)
+        if mode == "incremental":
+            result = insert.upsert_books(conn, rows, "copy", batch_size)
+        else:
+            result = insert.insert_books(conn, rows, "copy", batch_size), 0, 0
+        conn.commit()
+        return result
+    finally:
+        stop.set()
+        conn.close()
+        if parser_thread.is_alive():
+            parser_thread.join()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parse the Ruby-hash book dump straight into PostgreSQL")
+    parser.add_argument("--input", type=str, default="task1_d.json", help="Ruby-hash dump to read")
+    parser.add_argument("--dsn", type=str, default=insert.DB, help="PostgreSQL connection string (or set BOOKS_DSN)")
+    parser.add_argument("--mode", choices=["full", "incremental"], default="full",
+                        help="Plain COPY, or stage and upsert only new/changed rows")
+    parser.add_argument("--batch-size", type=int, default=insert.BATCH_SIZE, help="Rows per COPY statement")
+    parser.add_argument("--queue-size", type=int, default=QUEUE_SIZE, help="Batches buffered between parser and writer")
+    parser.add_argument("--chunk-size", type=int, default=read.CHUNK_SIZE, help="Bytes read per chunk")
+    parser.add_argument("--workers", type=int, default=1, help="Parse the dump in this many processes")
+    args = parser.parse_args()
+
+    errors = []
+
+    def report(err):
+        errors.append(err)
+        print(f"Skipping malformed record: {err}", file=sys.stderr)
+
+    if args.workers > 1:
+        books = read.iter_books_parallel(args.input, args.workers, report)
+    else:
+        books = read.iter_books(args.input, args.chunk_size, report)
+
+    inserted, updated, unchanged = run_pipeline(books, args.dsn, args.mode, args.batch_size, args.queue_size)
+    print(f" Inserted {inserted}, updated {updated}, unchanged {unchanged} records in PostgreSQL")
+    if errors:
+        print(f"{len(errors)} malformed records were reported", file=sys.stderr)
+        sys.exit(1)
@@ -1,31 +1,447 @@
 
+import os
 import re
+import sys
 import json
+import mmap
+import argparse
+from collections import deque
+from multiprocessing import Pool
 
-# Step 1: Read the invalid JSON file
-with open("task1_d.json", "r", encoding="utf-8") as f:
-    raw_data = f.read()
-
-# Step 2: Extract all records using regex
-pattern = re.compile(r'\{:id=>\s*(\d+),\s*:title=>"(.*?)",\s*:author=>"(.*?)",\s*:genre=>"(.*?)",\s*:publisher=>"(.*?)",\s*:year=>(\d+),\s*:price=>"(.*?)"\}')
-matches = pattern.findall(raw_data)
-
-# Step 3: Convert matches to list of dictionaries
-books = []
-for m in matches:
-    book_id, title, author, genre, publisher, year, price = m
-    books.append({
-        "id": int(book_id),
-        "title": title,
-        "author": author,
-        "genre": genre,
-        "publisher": publisher,
-        "year": int(year),
-        "price": price
-    })
-
-# Step 4: Save as valid JSON
-with open("task1_d_clean.json", "w", encoding="utf-8") as f:
-    json.dump(books, f, indent=4, ensure_ascii=False)
-
-print(f"Converted {len(books)} records to valid JSON and saved as task1_d_clean.json")
+CHUNK_SIZE = 1 << 20
+# A malformed record that is still open after this many bytes is reported
+# instead of waiting for the rest of the file
+MAX_RECORD_SIZE = 1 << 20
+SHARD_SIZE = 64 << 20
+BOOK_FIELDS = ("id", "title", "author", "genre", "publisher", "year", "price")
+
+# Fast path for records in the dump's usual key order without escapes; any
+# other record falls through to the tokenizer below.
+CANONICAL = re.compile(
+    rb'\{:id=>(\d+), :title=>"([^"\\]*)", :author=>"([^"\\]*)", :genre=>"([^"\\]*)", '
+    rb':publisher=>"([^"\\]*)", :year=>(\d+), :price=>"([^"\\]*)"\}'
+)
+
+# Ruby hash-literal tokens, e.g. {:id=>1, :title=>"A \"B\"", :tags=>["x", 2]}.
+# The string pattern is the unrolled-loop form, so it never backtracks.
+TOKEN = re.compile(rb"""\s*(?:
+    (?P<str>"[^"\\]*(?:\\.[^"\\]*)*")
+  | :(?P<sym>[A-Za-z_]\w*[?!]?)
+  | (?P<label>[A-Za-z_]\w*[?!]?):(?!:)
+  | (?P<num>[-+]?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?)
+  | (?P<op>=>|[{}\[\],])
+  | (?P<word>nil|true|false)
+)""", re.X | re.S)
+WHITESPACE = re.compile(rb"\s*")
+SEPARATOR = re.compile(rb"[\s,\[\]]*")
+BOUNDARY = re.compile(rb"\}\s*,\s*\{")
+# Strings (whole, or a lone quote when unterminated) and braces, enough to
+# find where a record ends without understanding its contents
+SKELETON = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"|"|[{}]', re.S)
+ESCAPE = re.compile(rb"\\(u\{[0-9a-fA-F ]+\}|u[0-9a-fA-F]{4}|x[0-9a-fA-F]{1,2}|[0-7]{1,3}|.)", re.S)
+
+SIMPLE_ESCAPES = {
+    b"n": b"\n", b"t": b"\t", b"r": b"\r", b"e": b"\x1b", b"s": b" ",
+    b"a": b"\a", b"b": b"\b", b"f": b"\f", b"v": b"\v",
+}
+WORDS = {b"nil": None, b"true": True, b"false": False}
+
+
+class ParseError(ValueError):
+    def __init__(self, message, offset):
+        super().__init__(message, offset)
+        self.message = message
+        self.offset = offset
+
+    def __str__(self):
+        return f"{self.message} at byte {self.offset}"
+
+
+def _unescape_one(m):
+    esc = m.group(1)
+    head = esc[:1]
+    if head == b"u":
+        points = esc[2:-1].split() if esc[1:2] == b"{" else [esc[1:]]
+        return "".join(chr(int(p, 16)) for p in points).encode("utf-8")
+    if head == b"x":
+        return bytes([int(esc[1:], 16)])
+    if head.isdigit():
+        return bytes([int(esc, 8) & 0xFF])
+    return SIMPLE_ESCAPES.get(esc, esc)
+
+
+def unescape(raw):
+    if b"\\" not in raw:
+        return raw.decode("utf-8")
+    return ESCAPE.sub(_unescape_one, raw).decode("utf-8", errors="replace")
+
+
+def _token(buf, pos):
+    m = TOKEN.match(buf, pos)
+    if m is None:
+        pos = WHITESPACE.match(buf, pos).end()
+        raise ParseError("unexpected end of input" if pos >= len(buf) else "unexpected character", pos)
+    return m
+
+
+def _parse_value(buf, pos):
+    m = _token(buf, pos)
+    kind = m.lastgroup
+    if kind == "str":
+        return unescape(m.group(kind)[1:-1]), m.end()
+    if kind == "num":
+        text = m.group(kind)
+        return (float(text) if b"." in text or b"e" in text or b"E" in text else int(text)), m.end()
+    if kind == "sym":
+        return m.group(kind).decode("utf-8"), m.end()
+    if kind == "word":
+        return WORDS[m.group(kind)], m.end()
+    if kind == "op":
+        op = m.group(kind)
+        if op == b"{":
+            return _parse_hash(buf, m.end())
+        if op == b"[":
+            return _parse_array(buf, m.end())
+    raise ParseError("expected a value", m.start(kind))
+
+
+def _parse_array(buf, pos):
+    items = []
+    m = _token(buf, pos)
+    while m.group("op") != b"]":
+        value, pos = _parse_value(buf, m.start(m.lastgroup))
+        items.append(value)
+        m = _token(buf, pos)
+        op = m.group("op")
+        if op == b",":
+            m = _token(buf, m.end())
+        elif op != b"]":
+            raise ParseError("expected ',' or ']'", m.start(m.lastgroup))
+    return items, m.end()
+
+
+def _parse_hash(buf, pos):
+    fields = {}
+    m = _token(buf, pos)
+    while m.group("op") != b"}":
+        kind = m.lastgroup
+        if kind == "label":
+            key = m.group(kind).decode("utf-8")
+        else:
+            if kind == "sym":
+                key = m.group(kind).decode("utf-8")
+            elif kind == "str":
+                key = unescape(m.group(kind)[1:-1])
+            else:
+                raise ParseError("expected a key", m.start(kind))
+            m = _token(buf, m.end())
+            if m.group("op") != b"=>":
+                raise ParseError("expected '=>'", m.start(m.lastgroup))
+        fields[key], pos = _parse_value(buf, m.end())
+        m = _token(buf, pos)
+        op = m.group("op")
+        if op == b",":
+            m = _token(buf, m.end())
+        elif op != b"}":
+            raise ParseError("expected ',' or '}'", m.start(m.lastgroup))
+    return fields, m.end()
+
+
+def to_book(fields, offset):
+    # Known columns first in their usual order, any extra keys after them
+    missing = [k for k in BOOK_FIELDS if k not in fields]
+    if missing:
+        raise ParseError(f"missing key :{missing[0]}", offset)
+    book = {k: fields.pop(k) for k in BOOK_FIELDS}
+    if type(book["id"]) is not int or type(book["year"]) is not int:
+        raise ParseError("id and year must be integers", offset)
+    book.update(fields)
+    return book
+
+
+def _record_end(buf, pos, limit):
+    # Offset just past the "}" closing the record that opens at pos, or None
+    # if it is not closed within limit bytes (or a string runs to the end)
+    depth = 0
+    for m in SKELETON.finditer(buf, pos, min(len(buf), pos + limit)):
+        token = m.group()
+        if token == b'"':
+            return None
+        if token == b"{":
+            depth += 1
+        elif token == b"}":
+            depth -= 1
+            if depth == 0:
+                return m.end()
+    return None
+
+
+def scan_books(buf, final=True, on_error=None, base=0):
+    # Yields books from buf and returns the offset where scanning stopped.
+    # With final=False a record that is not closed before the end of the
+    # buffer is left unread so the caller can retry once more data has arrived.
+    pos = 0
+    end = len(buf)
+    while True:
+        pos = SEPARATOR.match(buf, pos).end()
+        if pos >= end:
+            return pos
+        m = CANONICAL.match(buf, pos)
+        if m is not None:
+            book_id, title, author, genre, publisher, year, price = m.groups()
+            yield {
+                "id": int(book_id),
+                "title": title.decode("utf-8"),
+                "author": author.decode("utf-8"),
+                "genre": genre.decode("utf-8"),
+                "publisher": publisher.decode("utf-8"),
+                "year": int(year),
+                "price": price.decode("utf-8")
+            }
+            pos = m.end()
+            continue
+        try:
+            if buf[pos] != 0x7B:
+                raise ParseError("expected '{'", pos)
+            fields, next_pos = _parse_hash(buf, pos + 1)
+            book = to_book(fields, pos)
+        except ParseError as e:
+            record_end = None
+            if buf[pos] == 0x7B:
+                record_end = _record_end(buf, pos, MAX_RECORD_SIZE)
+                if record_end is None and not final and end - pos < MAX_RECORD_SIZE:
+                    return pos
+            nxt = None if record_end is not None else BOUNDARY.search(buf, max(e.offset, pos))
+            if record_end is None and nxt is None and not final:
+                return pos
+            err = ParseError(e.message, base + e.offset)
+            if on_error is None:
+                raise err
+            on_error(err)
+            if record_end is not None:
+                pos = record_end
+            elif nxt is None:
+                return end
+            else:
+                pos = nxt.end() - 1
+            continue
+        yield book
+        pos = next_pos
+
+
+def iter_books(path, chunk_size=CHUNK_SIZE, on_error=None):
+    # Records may be split across chunks, so the unread tail of one buffer is
+    # carried over into the next read.
+    with open(path, "rb") as f:
+        buf = b""
+        base = 0
+        while True:
+            chunk = f.read(chunk_size)
+            final = not chunk
+            buf += chunk
+            pos = yield from scan_books(buf, final, on_error, base)
+            if final:
+                break
+            buf = buf[pos:]
+            base += pos
+
+
+def json_line(book):
+    return json.dumps(book, ensure_ascii=False) + "\n"
+
+
+def json_array_item(book):
+    return "    " + json.dumps(book, indent=4, ensure_ascii=False).replace("\n", "\n    ")
+
+
+def write_jsonl(books, f):
+    count = 0
+    for book in books:
+        f.write(json_line(book))
+        count += 1
+    return count
+
+
+def write_json_array(books, f):
+    # Same layout as json.dump(books, f, indent=4), one record at a time
+    count = 0
+    for book in books:
+        f.write(",\n" if count else "[\n")
+        f.write(json_array_item(book))
+        count += 1
+    f.write("\n]" if count else "[]")
+    return count
+
+
+def _starts_record(buf, pos):
+    # A "}, {" inside a string is not a boundary; the text after a real one
+    # parses as a record
+    if CANONICAL.match(buf, pos) is not None:
+        return True
+    try:
+        _parse_hash(buf, pos + 1)
+    except ParseError:
+        return False
+    return True
+
+
+def shard_bounds(buf, shards):
+    # Cut points sit right after the "}" of a "}, {" boundary, so every shard
+    # holds whole records and can be parsed on its own.
+    size = len(buf)
+    bounds = [0]
+    for i in range(1, shards):
+        pos = max(size * i // shards, bounds[-1])
+        m = BOUNDARY.search(buf, pos)
+        while m is not None and not _starts_record(buf, m.end() - 1):
+            m = BOUNDARY.search(buf, m.end() - 1)
+        if m is None:
+            break
+        bounds.append(m.start() + 1)
+    bounds.append(size)
+    return [(start, end) for start, end in zip(bounds, bounds[1:]) if end > start]
+
+
+def shard_path(output, index):
+    root, ext = os.path.splitext(output)
+    return f"{root}.part{index:05d}{ext}"
+
+
+def _parse_shard(task):
+    # Runs in a worker process: parse one byte range of the mapped file and
+    # return either the parsed books or their serialized form.
+    path, start, end, render, output = task
+    errors = []
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        books = scan_books(mm[start:end], True, errors.append, start)
+        if render is None:
+            return list(books), errors
+        if output is None:
+            return [render(book) for book in books], errors
+        with open(output, "w", encoding="utf-8") as out:
+            count = 0
+            for book in books:
+                out.write(render(book))
+                count += 1
+        return count, errors
+
+
+def _shard_tasks(path, workers, render=None, output=None):
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return []
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            bounds = shard_bounds(mm, max(workers * 4, len(mm) // SHARD_SIZE))
+    return [
+        (path, start, end, render, None if output is None else shard_path(output, i))
+        for i, (start, end) in enumerate(bounds)
+    ]
+
+
+def _report(errors, on_error):
+    for err in errors:
+        if on_error is None:
+            raise err
+        on_error(err)
+
+
+def _imap_bounded(pool, func, tasks, pending):
+    # Like pool.imap, but at most `pending` results are submitted and not yet
+    # consumed, so a slow consumer holds back the workers instead of letting
+    # parsed shards pile up in the parent
+    tasks = iter(tasks)
+    window = deque()
+    for task in tasks:
+        window.append(pool.apply_async(func, (task,)))
+        if len(window) >= pending:
+            break
+    while window:
+        result = window.popleft().get()
+        for task in tasks:
+            window.append(pool.apply_async(func, (task,)))
+            break
+        yield result
+
+
+def iter_books_parallel(path, workers, on_error=None, pending=None):
+    # Shards are parsed in a process pool and merged back in file order;
+    # at most `pending` parsed shards (default 2 per worker) are held at once
+    with Pool(workers) as pool:
+        tasks = _shard_tasks(path, workers)
+        for books, errors in _imap_bounded(pool, _parse_shard, tasks, pending or 2 * workers):
+            _report(errors, on_error)
+            yield from books
+
+
+def convert_parallel(path, output, fmt, workers, on_error=None, per_shard=False):
+    # Workers serialize their own records, so the parent only concatenates
+    # text; with per_shard every shard goes to its own numbered file instead.
+    render = json_line if fmt == "jsonl" or per_shard else json_array_item
+    tasks = _shard_tasks(path, workers, render, output if per_shard else None)
+    count = 0
+    with Pool(workers) as pool:
+        results = _imap_bounded(pool, _parse_shard, tasks, 2 * workers)
+        if per_shard:
+            for n, errors in results:
+                _report(errors, on_error)
+                count += n
+            return count
+        with open(output, "w", encoding="utf-8") as f:
+            for items, errors in results:
+                _report(errors, on_error)
+                if not items:
+                    continue
+                if fmt == "jsonl":
+                    f.writelines(items)
+                else:
+                    f.write(",\n" if count else "[\n")
+                    f.write(",\n".join(items))
+                count += len(items)
+            if fmt != "jsonl":
+                f.write("\n]" if count else "[]")
+    return count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert the Ruby-hash book dump to valid JSON")
+    parser.add_argument("--input", type=str, default="task1_d.json", help="Ruby-hash dump to read")
+    parser.add_argument("--output", type=str, default="task1_d_clean.json", help="Output file path")
+    parser.add_argument("--format", choices=["json", "jsonl"], default=None,
+                        help="JSON array or JSON Lines (default: from output extension)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="Bytes read per chunk")
+    parser.add_argument("--strict", action="store_true", help="Stop at the first malformed record")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Parse shards of the memory-mapped input in this many processes")
+    parser.add_argument("--per-shard", action="store_true",
+                        help="With --workers, write one JSON Lines file per shard instead of merging")
+    args = parser.parse_args()
+
+    fmt = args.format or ("jsonl" if args.output.endswith(".jsonl") else "json")
+    write = write_jsonl if fmt == "jsonl" else write_json_array
+
+    errors = []
+
+    def report(err):
+        errors.append(err)
+        print(f"Skipping malformed record: {err}", file=sys.stderr)
+
+    on_error = None if args.strict else report
+    try:
+        if args.workers > 1 or args.per_shard:
+            count = convert_parallel(args.input, args.output, fmt, args.workers, on_error, args.per_shard)
+        else:
+            books = iter_books(args.input, args.chunk_size, on_error)
+            with open(args.output, "w", encoding="utf-8") as f:
+                count = write(books, f)
+    except ParseError as err:
+        # --strict: report the first malformed record and drop the partial output
+        print(f"Malformed record: {err}", file=sys.stderr)
+        if not args.per_shard and os.path.exists(args.output):
+            os.remove(args.output)
+        sys.exit(1)
+
+    saved_as = shard_path(args.output, 0).replace("00000", "NNNNN") if args.per_shard else args.output
+    print(f"Converted {count} records to valid JSON and saved as {saved_as}")
+    if errors:
+        print(f"{len(errors)} malformed records were reported", file=sys.stderr)
+        sys.exit(1)